@@ -9,7 +9,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import Base
-from app.models import User, Script, Persona, Call, Achievement, UserStats
+from app.models import User, Script, Persona, Call, CallTurn, Achievement, UserStats, AnalysisJob, AnalysisCacheEntry
 from app.config import settings
 
 # this is the Alembic Config object, which provides
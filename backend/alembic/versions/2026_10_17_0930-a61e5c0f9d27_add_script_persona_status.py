@@ -0,0 +1,41 @@
+"""Add script persona generation status
+
+Revision ID: a61e5c0f9d27
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-17 09:30:41.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61e5c0f9d27'
+down_revision = '3f9c2a7d41b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Batch mode so SQLite rebuilds the tables: it can't ALTER constraints or add a
+    # column with a non-constant default
+    with op.batch_alter_table('scripts') as batch_op:
+        # Scripts created before this migration already have their personas
+        batch_op.add_column(sa.Column('persona_status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus'), server_default='COMPLETED', nullable=False))
+        batch_op.add_column(sa.Column('persona_attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('persona_error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('persona_updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+        batch_op.create_index(batch_op.f('ix_scripts_persona_status'), ['persona_status'], unique=False)
+    with op.batch_alter_table('personas') as batch_op:
+        batch_op.create_unique_constraint('uq_personas_script_difficulty', ['script_id', 'difficulty'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('personas') as batch_op:
+        batch_op.drop_constraint('uq_personas_script_difficulty', type_='unique')
+    with op.batch_alter_table('scripts') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scripts_persona_status'))
+        batch_op.drop_column('persona_updated_at')
+        batch_op.drop_column('persona_error')
+        batch_op.drop_column('persona_attempts')
+        batch_op.drop_column('persona_status')
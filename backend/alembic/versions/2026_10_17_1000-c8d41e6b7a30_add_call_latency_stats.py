@@ -0,0 +1,24 @@
+"""Add call latency stats
+
+Revision ID: c8d41e6b7a30
+Revises: a61e5c0f9d27
+Create Date: 2026-10-17 10:00:12.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d41e6b7a30'
+down_revision = 'a61e5c0f9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('calls', sa.Column('latency_stats', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('calls', 'latency_stats')
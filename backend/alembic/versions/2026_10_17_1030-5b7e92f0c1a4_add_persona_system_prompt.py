@@ -0,0 +1,27 @@
+"""Add precompiled persona system prompt
+
+Revision ID: 5b7e92f0c1a4
+Revises: c8d41e6b7a30
+Create Date: 2026-10-17 10:30:27.640915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e92f0c1a4'
+down_revision = 'c8d41e6b7a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing personas are compiled lazily on their next call connect
+    op.add_column('personas', sa.Column('system_prompt', sa.Text(), nullable=True))
+    op.add_column('personas', sa.Column('prompt_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('personas', 'prompt_version')
+    op.drop_column('personas', 'system_prompt')
@@ -0,0 +1,57 @@
+"""Add rolling score windows to user stats
+
+Revision ID: e2a9c4d87f15
+Revises: 5b7e92f0c1a4
+Create Date: 2026-10-17 11:00:08.271455
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c4d87f15'
+down_revision = '5b7e92f0c1a4'
+branch_labels = None
+depends_on = None
+
+
+def _recent(limit: int, offset: int = 0) -> str:
+    return (
+        "(SELECT AVG(score) FROM (SELECT score FROM calls "
+        "WHERE calls.user_id = user_stats.user_id AND calls.score IS NOT NULL "
+        f"ORDER BY created_at DESC, id DESC LIMIT {limit} OFFSET {offset}) AS recent)"
+    )
+
+
+def upgrade() -> None:
+    op.add_column('user_stats', sa.Column('avg_last_5', sa.Float(), nullable=True))
+    op.add_column('user_stats', sa.Column('avg_last_10', sa.Float(), nullable=True))
+    op.add_column('user_stats', sa.Column('avg_7d', sa.Float(), nullable=True))
+    op.add_column('user_stats', sa.Column('recent_improvement', sa.Float(), server_default='0', nullable=False))
+
+    # Backfill from existing scored calls
+    scored_count = (
+        "(SELECT COUNT(*) FROM calls "
+        "WHERE calls.user_id = user_stats.user_id AND calls.score IS NOT NULL)"
+    )
+    op.execute(sa.text(
+        f"""
+        UPDATE user_stats SET
+            avg_last_5 = {_recent(5)},
+            avg_last_10 = {_recent(10)},
+            avg_7d = (SELECT AVG(score) FROM calls
+                      WHERE calls.user_id = user_stats.user_id AND calls.score IS NOT NULL
+                      AND calls.created_at >= :since),
+            recent_improvement = CASE WHEN {scored_count} >= 10
+                THEN {_recent(5)} - {_recent(5, 5)} ELSE 0 END
+        """
+    ).bindparams(since=datetime.utcnow() - timedelta(days=7)))
+
+
+def downgrade() -> None:
+    op.drop_column('user_stats', 'recent_improvement')
+    op.drop_column('user_stats', 'avg_7d')
+    op.drop_column('user_stats', 'avg_last_10')
+    op.drop_column('user_stats', 'avg_last_5')
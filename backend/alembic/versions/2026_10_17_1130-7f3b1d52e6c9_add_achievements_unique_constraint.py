@@ -0,0 +1,31 @@
+"""Add unique constraint on user achievements
+
+Revision ID: 7f3b1d52e6c9
+Revises: e2a9c4d87f15
+Create Date: 2026-10-17 11:30:44.105829
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3b1d52e6c9'
+down_revision = 'e2a9c4d87f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the earliest award where the old code inserted duplicates
+    op.execute(
+        "DELETE FROM achievements WHERE id NOT IN "
+        "(SELECT MIN(id) FROM achievements GROUP BY user_id, achievement_type)"
+    )
+    # Batch mode so SQLite, which can't ALTER constraints, rebuilds the table
+    with op.batch_alter_table('achievements') as batch_op:
+        batch_op.create_unique_constraint('uq_achievements_user_type', ['user_id', 'achievement_type'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('achievements') as batch_op:
+        batch_op.drop_constraint('uq_achievements_user_type', type_='unique')
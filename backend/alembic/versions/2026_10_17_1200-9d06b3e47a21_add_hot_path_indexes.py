@@ -0,0 +1,33 @@
+"""Add hot-path indexes on calls
+
+Revision ID: 9d06b3e47a21
+Revises: 7f3b1d52e6c9
+Create Date: 2026-10-17 12:00:36.884120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d06b3e47a21'
+down_revision = '7f3b1d52e6c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Already covered by earlier migrations:
+    #   achievements (user_id, achievement_type) -> uq_achievements_user_type
+    #   personas (script_id, ...)               -> uq_personas_script_difficulty
+    op.create_index('ix_calls_user_created', 'calls', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_calls_user_scored', 'calls', ['user_id', 'created_at', 'id'], unique=False,
+        postgresql_where=sa.text('score IS NOT NULL'),
+        sqlite_where=sa.text('score IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_user_scored', table_name='calls')
+    op.drop_index('ix_calls_user_created', table_name='calls')
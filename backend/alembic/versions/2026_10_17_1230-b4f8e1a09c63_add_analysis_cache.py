@@ -0,0 +1,34 @@
+"""Add analysis cache
+
+Revision ID: b4f8e1a09c63
+Revises: 9d06b3e47a21
+Create Date: 2026-10-17 12:30:51.337206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f8e1a09c63'
+down_revision = '9d06b3e47a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('prompt_version', sa.Integer(), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_analysis_cache_last_used_at'), 'analysis_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_cache_last_used_at'), table_name='analysis_cache')
+    op.drop_table('analysis_cache')
@@ -0,0 +1,39 @@
+"""Add call turns
+
+Revision ID: d17a3c85e2f4
+Revises: b4f8e1a09c63
+Create Date: 2026-10-17 13:00:27.914362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd17a3c85e2f4'
+down_revision = 'b4f8e1a09c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('call_turns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('call_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('speaker', sa.String(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('start_offset_ms', sa.Integer(), nullable=True),
+    sa.Column('end_offset_ms', sa.Integer(), nullable=True),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('call_id', 'seq', name='uq_call_turns_call_seq')
+    )
+    op.create_index(op.f('ix_call_turns_id'), 'call_turns', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_turns_id'), table_name='call_turns')
+    op.drop_table('call_turns')
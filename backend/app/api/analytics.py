@@ -1,72 +1,67 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.user_stats import UserStats
 from app.models.achievement import Achievement
-from app.models.call import Call
 from app.schemas.analytics import UserStatsResponse, LeaderboardEntry
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, Principal
+from app.services.leaderboard import leaderboard
 
 router = APIRouter()
 
 @router.get("/user-stats", response_model=UserStatsResponse)
 async def get_user_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get current user's statistics."""
-    stats = db.query(UserStats).filter(UserStats.user_id == current_user.id).first()
-    achievements = db.query(Achievement).filter(Achievement.user_id == current_user.id).all()
-    
-    # Calculate recent improvement (last 5 calls vs previous 5 calls)
-    recent_calls = db.query(Call).filter(
-        Call.user_id == current_user.id,
-        Call.score.isnot(None)
-    ).order_by(Call.created_at.desc()).limit(10).all()
-    
-    recent_improvement = 0.0
-    if len(recent_calls) >= 10:
-        recent_avg = sum(c.score for c in recent_calls[:5]) / 5
-        previous_avg = sum(c.score for c in recent_calls[5:10]) / 5
-        recent_improvement = recent_avg - previous_avg
+    stats = await db.scalar(select(UserStats).where(UserStats.user_id == current_user.id))
+    achievements = (await db.scalars(
+        select(Achievement).where(Achievement.user_id == current_user.id)
+    )).all()
     
     return UserStatsResponse(
         total_calls=stats.total_calls if stats else 0,
         avg_score=stats.avg_score if stats else 0.0,
         achievements=[a.achievement_type for a in achievements],
-        recent_improvement=recent_improvement
+        recent_improvement=stats.recent_improvement if stats else 0.0,
+        avg_last_5=stats.avg_last_5 if stats else None,
+        avg_last_10=stats.avg_last_10 if stats else None,
+        avg_7d=stats.avg_7d if stats else None
     )
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get leaderboard of all users."""
-    # Query user stats with user info, ordered by avg_score
-    results = db.query(
-        UserStats.user_id,
-        User.email,
-        UserStats.total_calls,
-        UserStats.avg_score
-    ).join(User, User.id == UserStats.user_id)\
-    .filter(UserStats.total_calls > 0)\
-    .order_by(UserStats.avg_score.desc())\
-    .all()
-    
-    # Add rankings
-    leaderboard = []
-    for rank, (user_id, email, total_calls, avg_score) in enumerate(results, start=1):
-        leaderboard.append(LeaderboardEntry(
-            user_id=user_id,
-            email=email,
-            total_calls=total_calls,
-            avg_score=avg_score,
-            rank=rank
-        ))
-    
-    return leaderboard
+    """Get one page of the leaderboard. X-Total-Count carries the number of ranked users."""
+    response.headers["X-Total-Count"] = str(await leaderboard.size())
+    return [
+        _leaderboard_entry(rank, entry)
+        for rank, entry in await leaderboard.page(offset, limit)
+    ]
+
+@router.get("/leaderboard/me", response_model=LeaderboardEntry)
+async def get_my_rank(current_user: Principal = Depends(get_current_user)):
+    """Get the current user's leaderboard position."""
+    ranked = await leaderboard.rank_of(current_user.id)
+    if ranked is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No scored calls yet"
+        )
+    return _leaderboard_entry(*ranked)
 
+def _leaderboard_entry(rank: int, entry) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        user_id=entry.user_id,
+        email=entry.email,
+        total_calls=entry.total_calls,
+        avg_score=entry.avg_score,
+        rank=rank
+    )
@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
 from app.models.user_stats import UserStats
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
-from app.utils.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from app.utils.auth import (
+    verify_password_async, get_password_hash_async, password_needs_rehash, auth_slot,
+    create_user_token, get_current_user, Principal
+)
 
 router = APIRouter()
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -19,23 +23,24 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    async with auth_slot():
+        hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         password_hash=hashed_password,
         role=user_data.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.flush()
     
-    # Create user stats
+    # Create user stats in the same transaction
     user_stats = UserStats(user_id=new_user.id)
     db.add(user_stats)
-    db.commit()
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create access token
-    access_token = create_access_token(data={"sub": new_user.id})
+    access_token = create_user_token(new_user)
     
     return Token(
         access_token=access_token,
@@ -43,17 +48,23 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     # Find user
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.password_hash):
+    user = await db.scalar(select(User).where(User.email == user_data.email))
+    async with auth_slot():
+        valid = user is not None and await verify_password_async(user_data.password, user.password_hash)
+        if valid and password_needs_rehash(user.password_hash):
+            # Transparently move the stored hash to the current work factor
+            user.password_hash = await get_password_hash_async(user_data.password)
+            await db.commit()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
     # Create access token
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_user_token(user)
     
     return Token(
         access_token=access_token,
@@ -61,6 +72,5 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     return UserResponse.from_orm(current_user)
-
@@ -1,31 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from typing import List
-import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime
-from app.database import get_db
-from app.models.user import User
+from typing import Optional, Tuple
+import asyncio
+import base64
+import json
+import logging
+import os
+from app.config import settings
+from app.database import get_async_db, AsyncSessionLocal
 from app.models.call import Call
+from app.models.call_turn import CallTurn
 from app.models.persona import Persona
-from app.models.user_stats import UserStats
-from app.models.achievement import Achievement
-from app.schemas.call import CallStart, CallResponse
-from app.utils.auth import get_current_user
-from app.services.openai_service import analyze_call, create_persona_system_prompt
+from app.schemas.call import (
+    CallStart, CallResponse, CallSummary, CallHistoryPage, CallTurnResponse, CallTurnPage, AnalysisStatusResponse
+)
+from app.utils.auth import get_current_user, Principal
+from app.services.persona_prompts import get_call_prompt
 from app.services.realtime_service import RealtimeCallHandler
+from app.services.audio_framing import ClientChannel, negotiate_binary
+from app.services.analysis_pipeline import enqueue_analysis
+from app.services.call_events import call_events, TERMINAL_EVENTS
+from app.services.call_turns import load_transcript, latest_turn, is_orphaned
+from app.services.call_recorder import SAMPLE_RATE, load_manifest, recording_dir
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/start", response_model=CallResponse, status_code=status.HTTP_201_CREATED)
 async def start_call(
     call_data: CallStart,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Initialize a new call session with a persona."""
     
     # Verify persona exists
-    persona = db.query(Persona).filter(Persona.id == call_data.persona_id).first()
+    persona = await db.get(Persona, call_data.persona_id)
     if not persona:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -38,176 +53,305 @@ async def start_call(
         persona_id=call_data.persona_id
     )
     db.add(new_call)
-    db.commit()
-    db.refresh(new_call)
+    await db.commit()
     
     return new_call
 
 @router.websocket("/realtime/{call_id}")
-async def realtime_call(websocket: WebSocket, call_id: int, db: Session = Depends(get_db)):
-    """WebSocket endpoint for real-time voice calls using OpenAI Realtime API."""
-    await websocket.accept()
+async def realtime_call(websocket: WebSocket, call_id: int):
+    """WebSocket endpoint for real-time voice calls using OpenAI Realtime API.
+
+    No session is held while the call is live: the DB is only touched in short
+    sessions before the call starts and after it ends, so pooled connections
+    are not tied up for the length of a voice call.
+
+    Clients that offer the binary subprotocol exchange raw PCM16 frames
+    (see app.services.audio_framing); everyone else gets JSON messages.
+    """
+    client = ClientChannel(websocket, binary=negotiate_binary(websocket))
+    await client.accept()
     
     try:
-        # Get call and persona
-        call = db.query(Call).filter(Call.id == call_id).first()
-        if not call:
-            await websocket.close(code=1008, reason="Call not found")
+        # Persona prompt is precompiled and cached; this is a single lookup on the hot path
+        async with AsyncSessionLocal() as db:
+            call_prompt = await get_call_prompt(db, call_id)
+        if call_prompt is None:
+            await client.close(code=1008, reason="Call not found")
             return
-        
-        persona = db.query(Persona).filter(Persona.id == call.persona_id).first()
-        script = persona.script
-        
-        # Create system prompt for the persona
-        system_prompt = create_persona_system_prompt({
-            "name": persona.name,
-            "difficulty": persona.difficulty,
-            "personality": persona.personality,
-            "objections": persona.objections
-        })
+        _, system_prompt = call_prompt
         
         # Initialize Realtime API handler
-        handler = RealtimeCallHandler(websocket, system_prompt)
+        handler = RealtimeCallHandler(client, system_prompt, call_id)
         
         # Handle the call
         transcript = await handler.handle_call()
         
-        # Update call with transcript and duration
-        call.transcript = transcript
-        call.duration = handler.duration
-        db.commit()
-        
-        # Analyze the call
-        analysis = await analyze_call(transcript, script.content, persona.name)
-        
-        # Update call with analysis
-        call.score = analysis.get("overall_score", 0)
-        call.feedback = json.dumps(analysis)
-        db.commit()
-        
-        # Update user stats
-        stats = db.query(UserStats).filter(UserStats.user_id == call.user_id).first()
-        if stats:
-            stats.total_calls += 1
-            # Calculate new average score
-            total_score = stats.avg_score * (stats.total_calls - 1) + call.score
-            stats.avg_score = total_score / stats.total_calls
-            db.commit()
-        
-        # Check for achievements
-        await check_and_award_achievements(db, call.user_id, call, stats)
-        
-        # Send final analysis to client
-        await websocket.send_json({
-            "type": "call_complete",
-            "analysis": analysis
-        })
+        # Subscribe before queueing so a fast job cannot finish unseen
+        with call_events.subscribe(call_id) as events:
+            async with AsyncSessionLocal() as db:
+                # Update call with transcript and duration
+                call = await db.get(Call, call_id)
+                call.transcript = transcript
+                call.duration = handler.duration
+                call.latency_stats = json.dumps(handler.latency_summary())
+                if handler.recorded:
+                    call.audio_url = f"{settings.BACKEND_URL}/calls/{call_id}/recording"
+                await db.commit()
+                
+                if not settings.CALL_ANALYSIS_ENABLED:
+                    return
+                
+                # Analysis runs in the background pipeline
+                job = await enqueue_analysis(db, call_id)
+            
+            # A client that hung up gets its result from GET /calls/{call_id}/analysis
+            if not client.is_open:
+                return
+            
+            await client.send_control({
+                "type": "analysis_pending",
+                "status": job.status.value
+            })
+            
+            # The socket only waits as a passive subscriber; the client may hang up
+            # and poll GET /calls/{call_id}/analysis instead. Streamed scores and
+            # feedback deltas are forwarded until call_complete or error.
+            deadline = asyncio.get_running_loop().time() + settings.ANALYSIS_PUSH_TIMEOUT_SECONDS
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    break
+                await client.send_control(event)
+                if event["type"] in TERMINAL_EVENTS:
+                    break
         
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected for call {call_id}")
+        logger.info("WebSocket disconnected for call %s", call_id)
     except Exception as e:
-        print(f"Error in realtime call: {e}")
-        await websocket.send_json({
-            "type": "error",
-            "message": str(e)
-        })
+        logger.exception("Error in realtime call %s", call_id)
+        if client.is_open:
+            try:
+                await client.send_control({
+                    "type": "error",
+                    "message": str(e)
+                })
+            except Exception:
+                # The client went away without us noticing
+                pass
     finally:
-        await websocket.close()
+        # No-op if the client hung up or the socket is already closed
+        await client.close()
 
 @router.post("/{call_id}/end")
 async def end_call(
     call_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Manually end a call and trigger analysis."""
-    call = db.query(Call).filter(Call.id == call_id, Call.user_id == current_user.id).first()
+    """Manually end a call and queue analysis.
+
+    If the worker relaying the call died before saving the transcript, it is
+    rebuilt from the turns that were persisted during the call. A call that
+    is still being relayed is left alone: its worker saves the transcript and
+    queues the analysis when the call ends.
+    """
+    call = await db.scalar(select(Call).where(Call.id == call_id, Call.user_id == current_user.id))
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Call not found"
         )
     
+    if not call.transcript and await is_orphaned(db, call):
+        call.transcript = await load_transcript(db, call_id) or None
+        last = await latest_turn(db, call_id)
+        if last.end_offset_ms is not None:
+            call.duration = last.end_offset_ms // 1000
+        await db.commit()
+    
     # If transcript exists but no analysis, analyze it
-    if call.transcript and not call.feedback:
-        persona = db.query(Persona).filter(Persona.id == call.persona_id).first()
-        script = persona.script
-        
-        analysis = await analyze_call(call.transcript, script.content, persona.name)
-        call.score = analysis.get("overall_score", 0)
-        call.feedback = json.dumps(analysis)
-        db.commit()
+    analysis_status = None
+    if call.transcript and not call.feedback and settings.CALL_ANALYSIS_ENABLED:
+        job = await enqueue_analysis(db, call_id)
+        analysis_status = job.status.value
     
-    return {"message": "Call ended", "call_id": call_id}
+    return {"message": "Call ended", "call_id": call_id, "analysis_status": analysis_status}
 
-@router.get("/{call_id}", response_model=CallResponse)
-async def get_call(
+def _encode_cursor(created_at: datetime, call_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{call_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, call_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(call_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+# Declared before /{call_id} so "history" is not parsed as a call id
+@router.get("/history", response_model=CallHistoryPage)
+async def get_call_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get one page of the user's call history, newest first.
+
+    Items are summaries only; fetch GET /calls/{call_id} for the transcript
+    and feedback. Pass next_cursor back as `cursor` to get the next page.
+    """
+    query = (
+        select(
+            Call.id,
+            Call.persona_id,
+            Persona.name.label("persona_name"),
+            Persona.difficulty.label("persona_difficulty"),
+            Call.score,
+            Call.duration,
+            Call.created_at
+        )
+        .join(Persona, Persona.id == Call.persona_id)
+        .where(Call.user_id == current_user.id)
+        .order_by(Call.created_at.desc(), Call.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(Call.created_at, Call.id) < tuple_(*_decode_cursor(cursor)))
+
+    rows = (await db.execute(query)).all()
+    items = [CallSummary.model_validate(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+    return CallHistoryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/{call_id}/turns", response_model=CallTurnPage)
+async def get_call_turns(
     call_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    after: Optional[int] = Query(None, ge=-1, description="Return turns with seq greater than this"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get details of a specific call."""
-    call = db.query(Call).filter(Call.id == call_id, Call.user_id == current_user.id).first()
-    if not call:
+    """Get one page of a call's transcript turns in spoken order.
+
+    Turns are saved in small batches while the call runs, so this also works
+    for a call in progress. Pass next_after back as `after` to continue.
+    """
+    owned = await db.scalar(select(Call.id).where(Call.id == call_id, Call.user_id == current_user.id))
+    if owned is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Call not found"
         )
-    return call
+    
+    query = (
+        select(CallTurn)
+        .where(CallTurn.call_id == call_id)
+        .order_by(CallTurn.seq)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(CallTurn.seq > after)
 
-@router.get("/history", response_model=List[CallResponse])
-async def get_call_history(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    turns = (await db.scalars(query)).all()
+    items = [CallTurnResponse.model_validate(turn) for turn in turns[:limit]]
+    next_after = items[-1].seq if len(turns) > limit else None
+    return CallTurnPage(items=items, next_after=next_after)
+
+async def _get_recording_manifest(db: AsyncSession, call_id: int, user_id: int) -> dict:
+    owned = await db.scalar(select(Call.id).where(Call.id == call_id, Call.user_id == user_id))
+    manifest = await asyncio.to_thread(load_manifest, call_id) if owned is not None else None
+    if manifest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not found"
+        )
+    return manifest
+
+@router.get("/{call_id}/recording")
+async def get_call_recording(
+    call_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get user's call history."""
-    calls = db.query(Call).filter(Call.user_id == current_user.id).order_by(Call.created_at.desc()).all()
-    return calls
+    """Get the manifest of a call's recording: format, duration and the list of chunks.
 
-async def check_and_award_achievements(db: Session, user_id: int, call: Call, stats: UserStats):
-    """Check and award achievements based on call performance."""
-    achievements_to_award = []
-    
-    # First Call achievement
-    if stats.total_calls == 1:
-        achievements_to_award.append("first_call")
-    
-    # Perfect Pitch (score >= 90)
-    if call.score >= 90:
-        # Check if not already awarded
-        existing = db.query(Achievement).filter(
-            Achievement.user_id == user_id,
-            Achievement.achievement_type == "perfect_pitch"
-        ).first()
-        if not existing:
-            achievements_to_award.append("perfect_pitch")
-    
-    # 10 Calls Milestone
-    if stats.total_calls == 10:
-        achievements_to_award.append("10_calls")
-    
-    # 50 Calls Milestone
-    if stats.total_calls == 50:
-        achievements_to_award.append("50_calls")
-    
-    # Objection Master (score >= 85 on hard persona)
-    persona = db.query(Persona).filter(Persona.id == call.persona_id).first()
-    if persona.difficulty == "hard" and call.score >= 85:
-        existing = db.query(Achievement).filter(
-            Achievement.user_id == user_id,
-            Achievement.achievement_type == "objection_master"
-        ).first()
-        if not existing:
-            achievements_to_award.append("objection_master")
-    
-    # Award achievements
-    for achievement_type in achievements_to_award:
-        achievement = Achievement(
-            user_id=user_id,
-            achievement_type=achievement_type
+    Each chunk is stereo PCM16 (caller left, persona right); fetch them in
+    order from GET /calls/{call_id}/recording/chunks/{index}.
+    """
+    return await _get_recording_manifest(db, call_id, current_user.id)
+
+@router.get("/{call_id}/recording/chunks/{index}")
+async def get_call_recording_chunk(
+    call_id: int,
+    index: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get one chunk of a call's recording.
+
+    Compressed chunks are sent as stored with Content-Encoding: gzip, so
+    clients receive raw PCM without the server decompressing anything.
+    """
+    manifest = await _get_recording_manifest(db, call_id, current_user.id)
+    if not 0 <= index < len(manifest["chunks"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chunk not found"
+        )
+    headers = {"Content-Encoding": "gzip"} if manifest["compression"] == "gzip" else None
+    return FileResponse(
+        os.path.join(recording_dir(call_id), manifest["chunks"][index]["file"]),
+        media_type=f"audio/L16;rate={SAMPLE_RATE};channels=2",
+        headers=headers
+    )
+
+@router.get("/{call_id}/analysis", response_model=AnalysisStatusResponse)
+async def get_call_analysis(
+    call_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get the status of a call's analysis job, and the result once it is done."""
+    call = await db.scalar(
+        select(Call).options(selectinload(Call.analysis_job))
+        .where(Call.id == call_id, Call.user_id == current_user.id)
+    )
+    if not call:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call not found"
         )
-        db.add(achievement)
     
-    if achievements_to_award:
-        db.commit()
+    job = call.analysis_job
+    return AnalysisStatusResponse(
+        call_id=call.id,
+        status=job.status.value if job else None,
+        attempts=job.attempts if job else 0,
+        last_error=job.last_error if job else None,
+        score=call.score,
+        analysis=json.loads(call.feedback) if call.feedback else None
+    )
 
+@router.get("/{call_id}", response_model=CallResponse)
+async def get_call(
+    call_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get details of a specific call."""
+    call = await db.scalar(select(Call).where(Call.id == call_id, Call.user_id == current_user.id))
+    if not call:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call not found"
+        )
+    return call
@@ -1,80 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models.user import User
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from app.database import get_async_db
 from app.models.script import Script
-from app.models.persona import Persona
+from app.models.analysis_job import JobStatus
 from app.schemas.script import ScriptCreate, ScriptResponse
-from app.utils.auth import get_current_user, get_current_admin_user
-from app.services.openai_service import generate_personas
-import json
+from app.utils.auth import get_current_user, get_current_admin_user, Principal
+from app.services.persona_pipeline import enqueue_persona_generation
+from app.services.catalog import get_catalog, invalidate_catalog, etag_matches
 
 router = APIRouter()
 
 @router.post("", response_model=ScriptResponse, status_code=status.HTTP_201_CREATED)
 async def create_script(
     script_data: ScriptCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
-    """Create a new script and automatically generate personas (Admin only)."""
+    """Create a new script and queue persona generation (Admin only).
+
+    Personas are generated in the background; poll the script's
+    `persona_status` until it is `completed`.
+    """
     
     # Create the script
     new_script = Script(
         title=script_data.title,
         content=script_data.content,
-        created_by=current_user.id
+        created_by=current_user.id,
+        persona_status=JobStatus.PENDING
     )
     db.add(new_script)
-    db.commit()
-    db.refresh(new_script)
+    await db.commit()
+    invalidate_catalog()
     
-    # Generate personas using GPT-5 Thinking
-    try:
-        personas_data = await generate_personas(script_data.content)
-        
-        # Create persona records
-        for persona_data in personas_data:
-            persona = Persona(
-                script_id=new_script.id,
-                difficulty=persona_data["difficulty"],
-                name=persona_data["name"],
-                personality=persona_data["personality"] if isinstance(persona_data["personality"], str) else json.dumps(persona_data["personality"]),
-                objections=persona_data["objections"] if isinstance(persona_data["objections"], str) else json.dumps(persona_data["objections"])
-            )
-            db.add(persona)
-        
-        db.commit()
-        db.refresh(new_script)
-        
-    except Exception as e:
-        # If persona generation fails, still return the script
-        print(f"Error generating personas: {e}")
+    await enqueue_persona_generation(db, new_script)
     
+    # Personas must be loaded eagerly; lazy loads are not allowed on async sessions
+    await db.refresh(new_script, attribute_names=["personas"])
     return new_script
 
+@router.post("/{script_id}/personas", response_model=ScriptResponse, status_code=status.HTTP_202_ACCEPTED)
+async def regenerate_personas(
+    script_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """Retry persona generation for a script (Admin only). Existing personas are kept."""
+    script = await db.get(Script, script_id)
+    if not script:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Script not found"
+        )
+    
+    await enqueue_persona_generation(db, script)
+    
+    await db.refresh(script, attribute_names=["personas"])
+    return script
+
 @router.get("", response_model=List[ScriptResponse])
 async def get_scripts(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all scripts with their personas."""
-    scripts = db.query(Script).all()
-    return scripts
+    """Get all scripts with their personas.
+
+    Served from the in-process catalog cache. Send the previous ETag in
+    If-None-Match to get a 304 when nothing has changed.
+    """
+    etag, body = await get_catalog()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/{script_id}", response_model=ScriptResponse)
 async def get_script(
     script_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific script with its personas."""
-    script = db.query(Script).filter(Script.id == script_id).first()
+    script = await db.scalar(
+        select(Script).options(selectinload(Script.personas)).where(Script.id == script_id)
+    )
     if not script:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Script not found"
         )
     return script
-
@@ -7,8 +7,75 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 60 * 24 * 7  # 7 days
+    JWT_TRUST_IDENTITY_CLAIMS: bool = False  # Authenticate from token claims alone; role changes wait for a new token
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on the next successful login
+    BCRYPT_WORKERS: int = 4  # Threads hashing passwords, per worker process
+    AUTH_MAX_CONCURRENT_HASHES: int = 8  # Logins/registrations doing password work at once
+    AUTH_QUEUE_TIMEOUT_SECONDS: float = 2.0  # Wait for a slot before answering 503
     FRONTEND_URL: str
     BACKEND_URL: str
+    LOG_LEVEL: str = "INFO"
+
+    # Database pool (per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+
+    # OpenAI client
+    OPENAI_TIMEOUT_SECONDS: float = 90.0
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENAI_MAX_CONCURRENT_REQUESTS: int = 8  # Cap on in-flight LLM calls per worker
+
+    # Realtime API endpoint; point at benchmarks/realtime_simulator.py for offline load tests
+    OPENAI_REALTIME_URL: str = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
+
+    # Realtime relay queues (per call, per direction); policies: block | drop_oldest | coalesce
+    RELAY_QUEUE_MAX_FRAMES: int = 200
+    RELAY_OPENAI_OVERFLOW_POLICY: str = "coalesce"
+    RELAY_CLIENT_OVERFLOW_POLICY: str = "coalesce"
+    RELAY_MAX_COALESCED_BYTES: int = 96000  # ~2s of 24 kHz PCM16
+    RELAY_DRAIN_TIMEOUT_SECONDS: float = 2.0
+    INPUT_AUDIO_COALESCE_MS: int = 100  # 0 disables batching of input_audio_buffer.append
+    INPUT_AUDIO_COALESCE_BYTES: int = 0  # 0 derives the size limit from the window
+    TURN_FLUSH_BATCH: int = 4  # Finished transcript turns buffered before a write
+    TURN_FLUSH_INTERVAL_SECONDS: float = 2.0  # ...or how long they may wait
+    CALL_ORPHANED_AFTER_SECONDS: int = 300  # Unfinished call with no new turns this long: its relay died
+
+    # Call recordings: stereo PCM16 chunks under RECORDINGS_DIR/<call_id>/
+    RECORDING_ENABLED: bool = True
+    RECORDINGS_DIR: str = "recordings"
+    RECORDING_CHUNK_SECONDS: float = 10.0
+    RECORDING_COMPRESS: bool = True  # gzip each chunk, in a thread
+    RECORDING_COMPRESS_LEVEL: int = 1  # Fast; speech PCM gains little from higher levels
+    RECORDING_QUEUE_MAX_FRAMES: int = 500  # Per call; frames beyond this are dropped, never waited on
+    RECORDING_MAX_BUFFER_SECONDS: float = 20.0  # Per channel; persona audio beyond this is written ahead
+    PERSONA_PROMPT_CACHE_SIZE: int = 1000  # Compiled persona prompts kept in memory per worker
+    LEADERBOARD_TTL_SECONDS: float = 60.0  # Full reload interval; picks up scores from other workers
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0  # Script catalog; local writes invalidate immediately
+
+    # Background jobs
+    CALL_ANALYSIS_ENABLED: bool = True  # Off for load tests: finished calls are saved but not analyzed
+    ANALYSIS_WORKERS: int = 4
+    ANALYSIS_QUEUE_SIZE: int = 500
+    ANALYSIS_MAX_ATTEMPTS: int = 3
+    ANALYSIS_RETRY_DELAY_SECONDS: float = 5.0
+    ANALYSIS_PUSH_TIMEOUT_SECONDS: float = 120.0  # How long a call socket waits for its result
+    ANALYSIS_CACHE_MEMORY_SIZE: int = 256  # Results kept in memory per worker
+    ANALYSIS_CACHE_MAX_ROWS: int = 50000  # analysis_cache table cap, least recently used evicted first
+    ANALYSIS_CACHE_TTL_DAYS: int = 30  # Entries unused this long are evicted
+    ANALYSIS_CACHE_EVICT_INTERVAL_SECONDS: float = 3600.0
+    PERSONA_WORKERS: int = 2
+    PERSONA_QUEUE_SIZE: int = 500
+    PERSONA_MAX_ATTEMPTS: int = 3
+    PERSONA_RETRY_DELAY_SECONDS: float = 10.0
+    JOB_SWEEP_INTERVAL_SECONDS: float = 30.0
+    JOB_STALE_SECONDS: int = 600  # A running job untouched this long is assumed abandoned
     
     class Config:
         env_file = ".env"
@@ -19,4 +86,3 @@ def get_settings():
     return Settings()
 
 settings = get_settings()
-
@@ -1,12 +1,45 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.config import settings
 from app.api import auth, scripts, calls, analytics
+from app.database import async_engine
+from app.services.openai_service import init_openai_service, close_openai_service
+from app.services.analysis_pipeline import start_analysis_pipeline, stop_analysis_pipeline
+from app.services.persona_pipeline import start_persona_pipeline, stop_persona_pipeline
+from app.services.loop_monitor import loop_monitor
+from app.services.realtime_service import RealtimeCallHandler
+from app.services import metrics
+from app.utils.auth import shutdown_password_pool
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared clients are built once per worker and reused by every request
+    init_openai_service()
+    await start_analysis_pipeline()
+    await start_persona_pipeline()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await stop_persona_pipeline()
+    await stop_analysis_pipeline()
+    await close_openai_service()
+    await async_engine.dispose()
+    shutdown_password_pool()
 
 app = FastAPI(
     title="AI Call Trainer API",
     description="API for AI-powered cold call training platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -18,6 +51,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_LATENCY.labels(
+            router=route.tags[0] if route is not None and getattr(route, "tags", None) else "root",
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status_code
+        ).observe(time.perf_counter() - started)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(scripts.router, prefix="/scripts", tags=["Scripts"])
@@ -30,5 +81,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "active_calls": RealtimeCallHandler.active_calls,
+        "event_loop_lag": loop_monitor.snapshot()
+    }
+
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
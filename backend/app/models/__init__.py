@@ -2,8 +2,11 @@ from app.models.user import User
 from app.models.script import Script
 from app.models.persona import Persona
 from app.models.call import Call
+from app.models.call_turn import CallTurn
 from app.models.achievement import Achievement
 from app.models.user_stats import UserStats
+from app.models.analysis_job import AnalysisJob, JobStatus
+from app.models.analysis_cache import AnalysisCacheEntry
 
-__all__ = ["User", "Script", "Persona", "Call", "Achievement", "UserStats"]
+__all__ = ["User", "Script", "Persona", "Call", "CallTurn", "Achievement", "UserStats", "AnalysisJob", "JobStatus", "AnalysisCacheEntry"]
 
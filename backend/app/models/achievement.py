@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Achievement(Base):
     __tablename__ = "achievements"
+    __table_args__ = (
+        # Awards are inserted with ON CONFLICT DO NOTHING against this
+        UniqueConstraint("user_id", "achievement_type", name="uq_achievements_user_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
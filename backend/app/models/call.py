@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -14,9 +14,24 @@ class Call(Base):
     duration = Column(Integer)  # Duration in seconds
     score = Column(Float)  # Score out of 100
     feedback = Column(Text)  # JSON string with detailed feedback
+    latency_stats = Column(Text)  # JSON string with per-turn latency and relay stats
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # History pages: WHERE user_id ORDER BY created_at DESC, id DESC
+        Index("ix_calls_user_created", user_id, created_at, id),
+        # Stats windows and achievement backfill only look at scored calls
+        Index(
+            "ix_calls_user_scored",
+            user_id, created_at, id,
+            postgresql_where=score.isnot(None),
+            sqlite_where=score.isnot(None)
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="calls")
     persona = relationship("Persona", back_populates="calls")
+    analysis_job = relationship("AnalysisJob", back_populates="call", uselist=False)
+    turns = relationship("CallTurn", back_populates="call", order_by="CallTurn.seq")
 
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+class CallTurn(Base):
+    __tablename__ = "call_turns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(Integer, ForeignKey("calls.id"), nullable=False)
+    seq = Column(Integer, nullable=False)  # Order within the call, assigned when the turn starts
+    speaker = Column(String, nullable=False)  # caller | persona
+    text = Column(Text, nullable=False)
+    start_offset_ms = Column(Integer)  # From the start of the call
+    end_offset_ms = Column(Integer)
+    latency_ms = Column(Integer)  # Persona turns: end of caller speech to first audio
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Also serves turn pages: WHERE call_id ORDER BY seq
+        UniqueConstraint("call_id", "seq", name="uq_call_turns_call_seq"),
+    )
+
+    # Relationships
+    call = relationship("Call", back_populates="turns")
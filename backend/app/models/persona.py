@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 from app.database import Base
@@ -10,6 +10,10 @@ class DifficultyLevel(str, enum.Enum):
 
 class Persona(Base):
     __tablename__ = "personas"
+    __table_args__ = (
+        # One persona per difficulty keeps generation retries idempotent
+        UniqueConstraint("script_id", "difficulty", name="uq_personas_script_difficulty"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     script_id = Column(Integer, ForeignKey("scripts.id"), nullable=False)
@@ -17,6 +21,8 @@ class Persona(Base):
     name = Column(String, nullable=False)
     personality = Column(Text, nullable=False)  # JSON string with personality traits
     objections = Column(Text, nullable=False)  # JSON string with common objections
+    system_prompt = Column(Text)  # Realtime instructions compiled at creation
+    prompt_version = Column(Integer)  # Template version system_prompt was compiled with
 
     # Relationships
     script = relationship("Script", back_populates="personas")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
+from app.models.analysis_job import JobStatus
 
 class Script(Base):
     __tablename__ = "scripts"
@@ -12,7 +13,12 @@ class Script(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Background persona generation
+    persona_status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    persona_attempts = Column(Integer, default=0, nullable=False)
+    persona_error = Column(Text)
+    persona_updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
     # Relationships
     creator = relationship("User", back_populates="scripts")
     personas = relationship("Persona", back_populates="script", cascade="all, delete-orphan")
-
@@ -10,6 +10,11 @@ class UserStats(Base):
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
     total_calls = Column(Integer, default=0, nullable=False)
     avg_score = Column(Float, default=0.0, nullable=False)
+    # Rolling windows, refreshed each time a call is scored
+    avg_last_5 = Column(Float)
+    avg_last_10 = Column(Float)
+    avg_7d = Column(Float)
+    recent_improvement = Column(Float, default=0.0, nullable=False)  # Last 5 vs previous 5
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -1,14 +1,14 @@
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.schemas.script import ScriptCreate, ScriptResponse
 from app.schemas.persona import PersonaResponse
-from app.schemas.call import CallStart, CallResponse, CallFeedback
+from app.schemas.call import CallStart, CallResponse, CallSummary, CallHistoryPage, CallTurnResponse, CallTurnPage, CallFeedback, AnalysisStatusResponse
 from app.schemas.analytics import UserStatsResponse, LeaderboardEntry
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "Token",
     "ScriptCreate", "ScriptResponse",
     "PersonaResponse",
-    "CallStart", "CallResponse", "CallFeedback",
+    "CallStart", "CallResponse", "CallSummary", "CallHistoryPage", "CallTurnResponse", "CallTurnPage", "CallFeedback", "AnalysisStatusResponse",
     "UserStatsResponse", "LeaderboardEntry"
 ]
 
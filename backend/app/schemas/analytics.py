@@ -1,11 +1,14 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class UserStatsResponse(BaseModel):
     total_calls: int
     avg_score: float
     achievements: List[str]
     recent_improvement: float
+    avg_last_5: Optional[float] = None
+    avg_last_10: Optional[float] = None
+    avg_7d: Optional[float] = None
 
 class LeaderboardEntry(BaseModel):
     user_id: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any, Dict, List
 
 class CallStart(BaseModel):
     persona_id: int
@@ -14,11 +14,44 @@ class CallResponse(BaseModel):
     duration: Optional[int] = None
     score: Optional[float] = None
     feedback: Optional[str] = None
+    latency_stats: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class CallSummary(BaseModel):
+    """History list item; transcript and feedback are only returned by GET /calls/{call_id}."""
+    id: int
+    persona_id: int
+    persona_name: str
+    persona_difficulty: str
+    score: Optional[float] = None
+    duration: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CallHistoryPage(BaseModel):
+    items: List[CallSummary]
+    next_cursor: Optional[str] = None  # None on the last page
+
+class CallTurnResponse(BaseModel):
+    seq: int
+    speaker: str  # caller | persona
+    text: str
+    start_offset_ms: Optional[int] = None
+    end_offset_ms: Optional[int] = None
+    latency_ms: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class CallTurnPage(BaseModel):
+    items: List[CallTurnResponse]
+    next_after: Optional[int] = None  # None on the last page saved so far
+
 class CallFeedback(BaseModel):
     score: float
     feedback: str
@@ -28,3 +61,11 @@ class CallFeedback(BaseModel):
     value_delivery: float
     outcome: str
 
+
+class AnalysisStatusResponse(BaseModel):
+    call_id: int
+    status: Optional[str] = None  # pending | running | completed | failed, None if never queued
+    attempts: int = 0
+    last_error: Optional[str] = None
+    score: Optional[float] = None
+    analysis: Optional[Dict[str, Any]] = None
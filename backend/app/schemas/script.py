@@ -22,6 +22,8 @@ class ScriptResponse(BaseModel):
     content: str
     created_by: int
     created_at: datetime
+    persona_status: Optional[str] = None  # pending | running | completed | failed
+    persona_error: Optional[str] = None
     personas: Optional[List[PersonaBase]] = []
 
     class Config:
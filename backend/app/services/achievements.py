@@ -0,0 +1,173 @@
+"""Achievement rules and awarding.
+
+Rules are plain predicates over an AchievementContext, registered with the
+@achievement decorator. Awarding loads the user's unlocked set once, runs
+every rule in memory and inserts whatever is new in one statement, so adding
+a rule never adds a query. The (user_id, achievement_type) unique constraint
+makes inserts idempotent across retries and concurrent workers.
+
+Backfill rules over historical calls (e.g. after adding one):
+
+    python -m app.services.achievements --batch-size 500
+"""
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, async_engine
+from app.models.achievement import Achievement
+from app.models.call import Call
+from app.models.persona import Persona, DifficultyLevel
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class AchievementContext:
+    """What a rule can see about a freshly scored call."""
+    score: float
+    difficulty: DifficultyLevel
+    total_calls: int  # Scored calls including this one
+
+@dataclass(frozen=True)
+class AchievementRule:
+    achievement_type: str
+    description: str
+    check: Callable[[AchievementContext], bool]
+
+RULES: Dict[str, AchievementRule] = {}
+
+def achievement(achievement_type: str, description: str):
+    """Register a rule. Rules are checked in registration order."""
+    def register(check: Callable[[AchievementContext], bool]):
+        if achievement_type in RULES:
+            raise ValueError(f"Duplicate achievement rule: {achievement_type}")
+        RULES[achievement_type] = AchievementRule(achievement_type, description, check)
+        return check
+    return register
+
+@achievement("first_call", "Complete your first scored call")
+def _first_call(ctx: AchievementContext) -> bool:
+    return ctx.total_calls >= 1
+
+@achievement("perfect_pitch", "Score 90 or higher on a call")
+def _perfect_pitch(ctx: AchievementContext) -> bool:
+    return ctx.score >= 90
+
+@achievement("10_calls", "Complete 10 scored calls")
+def _ten_calls(ctx: AchievementContext) -> bool:
+    return ctx.total_calls >= 10
+
+@achievement("50_calls", "Complete 50 scored calls")
+def _fifty_calls(ctx: AchievementContext) -> bool:
+    return ctx.total_calls >= 50
+
+@achievement("objection_master", "Score 85 or higher against a hard persona")
+def _objection_master(ctx: AchievementContext) -> bool:
+    return ctx.difficulty == DifficultyLevel.HARD and ctx.score >= 85
+
+def evaluate(ctx: AchievementContext, unlocked: Set[str], rules: Optional[Iterable[AchievementRule]] = None) -> List[str]:
+    """Return the achievement types newly earned by this call. Pure; no I/O."""
+    rules = RULES.values() if rules is None else rules
+    return [
+        rule.achievement_type for rule in rules
+        if rule.achievement_type not in unlocked and rule.check(ctx)
+    ]
+
+async def _insert_awards(db: AsyncSession, rows: List[dict]):
+    if not rows:
+        return
+    insert = postgresql_insert if async_engine.dialect.name == "postgresql" else sqlite_insert
+    await db.execute(
+        insert(Achievement)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "achievement_type"])
+    )
+
+async def award_achievements(db: AsyncSession, user_id: int, ctx: AchievementContext) -> List[str]:
+    """Award whatever this call unlocked. Two statements regardless of rule count; the caller commits."""
+    unlocked = set((await db.scalars(
+        select(Achievement.achievement_type).where(Achievement.user_id == user_id)
+    )).all())
+    earned = evaluate(ctx, unlocked)
+    now = datetime.utcnow()
+    await _insert_awards(db, [
+        {"user_id": user_id, "achievement_type": achievement_type, "unlocked_at": now}
+        for achievement_type in earned
+    ])
+    return earned
+
+async def backfill_achievements(batch_size: int = 500, rule_types: Optional[List[str]] = None) -> int:
+    """Replay scored calls through the rules, a batch of users per transaction.
+
+    Awards are dated to the call that earned them. Safe to re-run: existing
+    awards are skipped by the unique constraint.
+    """
+    rules = [RULES[t] for t in rule_types] if rule_types else list(RULES.values())
+    awarded = 0
+    last_user_id = 0
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            user_ids = list((await db.scalars(
+                select(Call.user_id)
+                .where(Call.user_id > last_user_id, Call.score.isnot(None))
+                .group_by(Call.user_id)
+                .order_by(Call.user_id)
+                .limit(batch_size)
+            )).all())
+            if not user_ids:
+                return awarded
+            last_user_id = user_ids[-1]
+
+            unlocked: Dict[int, Set[str]] = {user_id: set() for user_id in user_ids}
+            for user_id, achievement_type in (await db.execute(
+                select(Achievement.user_id, Achievement.achievement_type)
+                .where(Achievement.user_id.in_(user_ids))
+            )).all():
+                unlocked[user_id].add(achievement_type)
+
+            calls = (await db.execute(
+                select(Call.user_id, Call.score, Call.created_at, Persona.difficulty)
+                .join(Persona, Persona.id == Call.persona_id)
+                .where(Call.user_id.in_(user_ids), Call.score.isnot(None))
+                .order_by(Call.user_id, Call.created_at, Call.id)
+            )).all()
+
+            rows = []
+            counts: Dict[int, int] = {}
+            for user_id, score, created_at, difficulty in calls:
+                counts[user_id] = counts.get(user_id, 0) + 1
+                ctx = AchievementContext(score=score, difficulty=difficulty, total_calls=counts[user_id])
+                for achievement_type in evaluate(ctx, unlocked[user_id], rules):
+                    unlocked[user_id].add(achievement_type)
+                    rows.append({"user_id": user_id, "achievement_type": achievement_type, "unlocked_at": created_at})
+
+            await _insert_awards(db, rows)
+            await db.commit()
+            awarded += len(rows)
+            logger.info("Backfilled %d achievements for users up to %d", len(rows), last_user_id)
+
+def _main():
+    parser = argparse.ArgumentParser(description="Backfill achievement rules over historical calls")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per transaction")
+    parser.add_argument("--rule", action="append", choices=sorted(RULES), help="Only backfill these rules (repeatable)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def run():
+        try:
+            total = await backfill_achievements(args.batch_size, args.rule)
+            logger.info("Done: %d achievements awarded", total)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.services.openai_service import get_openai_service, StreamCallback
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when OpenAIService.analyze_call's prompt or model changes; older entries stop matching
+ANALYSIS_PROMPT_VERSION = 2
+
+_memory = LRUCache(settings.ANALYSIS_CACHE_MEMORY_SIZE)
+_in_flight: Dict[str, asyncio.Task] = {}
+_last_eviction = 0.0
+
+def analysis_cache_key(transcript: str, script_content: str, persona_name: str) -> str:
+    """Content address for an analysis. Scripts are immutable, so their content hash is their version."""
+    script_hash = hashlib.sha256(script_content.encode("utf-8")).hexdigest()
+    material = json.dumps([ANALYSIS_PROMPT_VERSION, transcript, script_hash, persona_name])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+async def cached_analyze_call(
+    transcript: str,
+    script_content: str,
+    persona_name: str,
+    on_event: Optional[StreamCallback] = None
+) -> dict:
+    """analyze_call behind a two-level cache (in-process LRU, then the analysis_cache table).
+
+    Concurrent requests for the same key in this process share one LLM call.
+    `on_event` receives streamed fields only when this caller starts the LLM
+    call; cache hits and merged requests just get the final result.
+    """
+    key = analysis_cache_key(transcript, script_content, persona_name)
+
+    cached = _memory.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    # The lookup runs as its own task so one caller being cancelled doesn't fail the others
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_or_analyze(key, transcript, script_content, persona_name, on_event))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return json.loads(await asyncio.shield(task))
+
+async def _load_or_analyze(
+    key: str,
+    transcript: str,
+    script_content: str,
+    persona_name: str,
+    on_event: Optional[StreamCallback]
+) -> str:
+    async with AsyncSessionLocal() as db:
+        stored = await db.scalar(
+            update(AnalysisCacheEntry)
+            .where(AnalysisCacheEntry.key == key)
+            .values(hits=AnalysisCacheEntry.hits + 1, last_used_at=datetime.utcnow())
+            .returning(AnalysisCacheEntry.result)
+        )
+        await db.commit()
+    if stored is not None:
+        _memory.set(key, stored)
+        return stored
+
+    # No session is held while waiting on the LLM
+    analysis = await get_openai_service().analyze_call(transcript, script_content, persona_name, on_event)
+    result = json.dumps(analysis)
+
+    async with AsyncSessionLocal() as db:
+        db.add(AnalysisCacheEntry(key=key, result=result, prompt_version=ANALYSIS_PROMPT_VERSION))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker stored the same key first; either result is valid
+            await db.rollback()
+
+    _memory.set(key, result)
+    await _maybe_evict()
+    return result
+
+async def _maybe_evict():
+    """Expire unused entries and cap the table size, at most once per ANALYSIS_CACHE_EVICT_INTERVAL_SECONDS."""
+    global _last_eviction
+    now = time.monotonic()
+    if now - _last_eviction < settings.ANALYSIS_CACHE_EVICT_INTERVAL_SECONDS:
+        return
+    _last_eviction = now
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(AnalysisCacheEntry).where(
+                    AnalysisCacheEntry.last_used_at < datetime.utcnow() - timedelta(days=settings.ANALYSIS_CACHE_TTL_DAYS)
+                )
+            )
+            # Least recently used entries beyond the row cap
+            overflow = (
+                select(AnalysisCacheEntry.key)
+                .order_by(AnalysisCacheEntry.last_used_at.desc())
+                .offset(settings.ANALYSIS_CACHE_MAX_ROWS)
+            )
+            await db.execute(delete(AnalysisCacheEntry).where(AnalysisCacheEntry.key.in_(overflow)))
+            await db.commit()
+    except Exception:
+        logger.exception("Analysis cache eviction failed")
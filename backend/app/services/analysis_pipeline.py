@@ -0,0 +1,273 @@
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import case, func, select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.call import Call
+from app.models.persona import Persona
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.models.analysis_job import AnalysisJob, JobStatus
+from app.services.achievements import AchievementContext, award_achievements
+from app.services.call_events import call_events
+from app.services.job_queue import JobQueue
+from app.services.leaderboard import leaderboard
+from app.services.analysis_cache import cached_analyze_call
+
+_queue: Optional[JobQueue] = None
+
+async def enqueue_analysis(db: AsyncSession, call_id: int) -> AnalysisJob:
+    """Create (or re-arm a failed) analysis job for a call and hand it to the workers."""
+    job = await db.scalar(select(AnalysisJob).where(AnalysisJob.call_id == call_id))
+    if job is None:
+        job = AnalysisJob(call_id=call_id, status=JobStatus.PENDING, attempts=0)
+        db.add(job)
+    elif job.status == JobStatus.FAILED:
+        job.status = JobStatus.PENDING
+        job.attempts = 0
+        job.last_error = None
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request created the job first
+        await db.rollback()
+        job = await db.scalar(select(AnalysisJob).where(AnalysisJob.call_id == call_id))
+
+    if job.status == JobStatus.PENDING:
+        get_analysis_queue().submit(call_id)
+    return job
+
+async def _claim_job(db: AsyncSession, call_id: int) -> bool:
+    """Atomically move a job to running so only one worker (in any process) runs it."""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    result = await db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.call_id == call_id,
+            or_(
+                AnalysisJob.status == JobStatus.PENDING,
+                # Reclaiming an abandoned run counts as an attempt
+                and_(
+                    AnalysisJob.status == JobStatus.RUNNING,
+                    AnalysisJob.updated_at < stale_before,
+                    AnalysisJob.attempts < settings.ANALYSIS_MAX_ATTEMPTS
+                )
+            )
+        )
+        .values(status=JobStatus.RUNNING, attempts=AnalysisJob.attempts + 1, updated_at=now)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+async def run_analysis_job(call_id: int):
+    """Analyze a finished call, then store the score, stats and achievements in one transaction."""
+    async with AsyncSessionLocal() as db:
+        if not await _claim_job(db, call_id):
+            return
+        call = await db.get(Call, call_id)
+        if call is None:
+            # Nothing to retry; don't leave the job running for the sweeper to reclaim
+            await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.call_id == call_id)
+                .values(status=JobStatus.FAILED, last_error="Call not found")
+            )
+            await db.commit()
+            return
+        persona = await db.scalar(
+            select(Persona).options(selectinload(Persona.script)).where(Persona.id == call.persona_id)
+        )
+        transcript = call.transcript or ""
+        script_content = persona.script.content
+        persona_name = persona.name
+        difficulty = persona.difficulty
+        email = await db.scalar(select(User.email).where(User.id == call.user_id))
+
+    # A retry streams from scratch; subscribers drop what an earlier attempt sent
+    call_events.publish(call_id, {"type": "analysis.reset"})
+
+    # No session is held while waiting on the LLM
+    analysis = await cached_analyze_call(transcript, script_content, persona_name, _stream_to_call(call_id))
+
+    async with AsyncSessionLocal() as db:
+        call = await db.get(Call, call_id)
+        call.score = analysis.get("overall_score", 0)
+        call.feedback = json.dumps(analysis)
+
+        stats = await update_user_stats(db, call)
+        if stats:
+            await award_achievements(db, call.user_id, AchievementContext(
+                score=call.score,
+                difficulty=difficulty,
+                total_calls=stats.total_calls
+            ))
+
+        job = await db.scalar(select(AnalysisJob).where(AnalysisJob.call_id == call_id))
+        job.status = JobStatus.COMPLETED
+        job.last_error = None
+        job.completed_at = datetime.utcnow()
+        await db.commit()
+
+    if stats:
+        leaderboard.record(stats.user_id, email, stats.total_calls, stats.avg_score)
+
+    call_events.publish(call_id, {
+        "type": "call_complete",
+        "analysis": analysis
+    })
+
+# Top-level analysis fields pushed as soon as the model has written them
+SCORE_FIELDS = ("overall_score", "script_adherence", "objection_handling", "tonality", "value_delivery", "outcome")
+
+def _stream_to_call(call_id: int):
+    """Forward a streaming analysis to the call's subscribers as it is generated."""
+    scores = {}
+
+    def on_event(kind: str, key, value):
+        if kind == "value" and key in SCORE_FIELDS:
+            scores[key] = value
+            call_events.publish(call_id, {"type": "analysis.scores", "scores": dict(scores)})
+        elif kind == "delta" and key == "feedback":
+            call_events.publish(call_id, {"type": "analysis.feedback.delta", "delta": value})
+
+    return on_event
+
+async def _on_job_failure(call_id: int, error: Exception) -> bool:
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(select(AnalysisJob).where(AnalysisJob.call_id == call_id))
+        if job is None:
+            return False
+        retry = job.attempts < settings.ANALYSIS_MAX_ATTEMPTS
+        job.status = JobStatus.PENDING if retry else JobStatus.FAILED
+        job.last_error = str(error)
+        await db.commit()
+
+    if not retry:
+        call_events.publish(call_id, {
+            "type": "error",
+            "message": f"Call analysis failed: {error}"
+        })
+    return retry
+
+async def _sweep_jobs() -> List[int]:
+    """Find pending jobs nobody queued (restart, full queue) and runs abandoned by a dead worker."""
+    now = datetime.utcnow()
+    pending_before = now - timedelta(seconds=settings.JOB_SWEEP_INTERVAL_SECONDS)
+    stale_before = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        # Runs that keep dying with their worker stop once they are out of attempts
+        exhausted = (await db.scalars(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.status == JobStatus.RUNNING,
+                AnalysisJob.updated_at < stale_before,
+                AnalysisJob.attempts >= settings.ANALYSIS_MAX_ATTEMPTS
+            )
+            .values(status=JobStatus.FAILED, last_error="Abandoned by its worker too many times", updated_at=now)
+            .returning(AnalysisJob.call_id)
+        )).all()
+        await db.commit()
+
+        result = await db.scalars(
+            select(AnalysisJob.call_id)
+            .where(or_(
+                and_(AnalysisJob.status == JobStatus.PENDING, AnalysisJob.updated_at < pending_before),
+                and_(AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.updated_at < stale_before)
+            ))
+            .order_by(AnalysisJob.created_at)
+            .limit(settings.ANALYSIS_QUEUE_SIZE)
+        )
+        call_ids = list(result.all())
+
+    for call_id in exhausted:
+        call_events.publish(call_id, {
+            "type": "error",
+            "message": "Call analysis failed: abandoned by its worker too many times"
+        })
+    return call_ids
+
+def _recent_scores(user_id: int, limit: int, offset: int = 0):
+    return (
+        select(Call.score)
+        .where(Call.user_id == user_id, Call.score.isnot(None))
+        .order_by(Call.created_at.desc(), Call.id.desc())
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+
+def _avg_of(scores):
+    return select(func.avg(scores.c.score)).scalar_subquery()
+
+async def update_user_stats(db: AsyncSession, call: Call) -> Optional[UserStats]:
+    """Fold a newly scored call into the user's stats in a single UPDATE ... RETURNING.
+
+    The increment and running mean are computed by the database, so concurrent
+    analyses for the same user cannot lose updates. The windowed averages are
+    recomputed from the user's most recent scored calls in the same statement;
+    avg_7d is as of the latest scored call.
+    """
+    # The windows must see this call's score
+    await db.flush()
+
+    last_10 = _recent_scores(call.user_id, 10)
+    previous_5 = _recent_scores(call.user_id, 5, offset=5)
+    last_5 = _recent_scores(call.user_id, 5)
+    since = datetime.utcnow() - timedelta(days=7)
+
+    return await db.scalar(
+        update(UserStats)
+        .where(UserStats.user_id == call.user_id)
+        .values(
+            total_calls=UserStats.total_calls + 1,
+            avg_score=UserStats.avg_score + (call.score - UserStats.avg_score) / (UserStats.total_calls + 1),
+            avg_last_5=_avg_of(last_5),
+            avg_last_10=_avg_of(last_10),
+            avg_7d=select(func.avg(Call.score)).where(
+                Call.user_id == call.user_id,
+                Call.score.isnot(None),
+                Call.created_at >= since
+            ).scalar_subquery(),
+            # Last 5 calls vs the 5 before them, once there are 10 to compare
+            recent_improvement=case(
+                (
+                    select(func.count()).select_from(last_10).scalar_subquery() >= 10,
+                    _avg_of(last_5) - _avg_of(previous_5)
+                ),
+                else_=0.0
+            ),
+            updated_at=datetime.utcnow()
+        )
+        .returning(UserStats),
+        execution_options={"populate_existing": True}
+    )
+
+def get_analysis_queue() -> JobQueue:
+    if _queue is None:
+        raise RuntimeError("Analysis pipeline is not running")
+    return _queue
+
+async def start_analysis_pipeline():
+    global _queue
+    _queue = JobQueue(
+        "analysis",
+        run_analysis_job,
+        workers=settings.ANALYSIS_WORKERS,
+        max_size=settings.ANALYSIS_QUEUE_SIZE,
+        on_failure=_on_job_failure,
+        sweep=_sweep_jobs,
+        sweep_interval=settings.JOB_SWEEP_INTERVAL_SECONDS,
+        retry_delay=settings.ANALYSIS_RETRY_DELAY_SECONDS
+    )
+    await _queue.start()
+
+async def stop_analysis_pipeline():
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
@@ -0,0 +1,62 @@
+from typing import Optional
+
+# PCM16 mono at 24 kHz, the format negotiated with the Realtime API
+PCM16_BYTES_PER_MS = 24000 * 2 // 1000
+
+class AudioCoalescer:
+    """Batch small input audio frames into fewer, larger upstream appends.
+
+    A batch is released when it reaches `max_bytes`, or once its oldest
+    frame has waited `max_delay_ms` (0 means no time limit, size only).
+    Callers must `flush()` on end of speech and end of call so no audio
+    sits in the buffer.
+    """
+
+    def __init__(self, max_delay_ms: int, max_bytes: int = 0):
+        self.max_delay = max_delay_ms / 1000
+        self.max_bytes = max_bytes or max_delay_ms * PCM16_BYTES_PER_MS
+        self.enabled = max_delay_ms > 0 or max_bytes > 0
+        self._buffer = bytearray()
+        self._first_at: Optional[float] = None
+
+        # Counters
+        self.frames_in = 0
+        self.batches_out = 0
+
+    def add(self, pcm: bytes, now: float) -> Optional[bytes]:
+        """Buffer a frame; returns a batch if the size limit was reached."""
+        self.frames_in += 1
+        if not self.enabled:
+            self.batches_out += 1
+            return pcm
+        if self._first_at is None:
+            self._first_at = now
+        self._buffer += pcm
+        if len(self._buffer) >= self.max_bytes:
+            return self.flush()
+        return None
+
+    @property
+    def pending(self) -> bool:
+        return self._first_at is not None
+
+    def time_until_flush(self, now: float) -> Optional[float]:
+        """Seconds until the buffered batch is due, or None if nothing is buffered or there is no time limit."""
+        if self._first_at is None or self.max_delay == 0:
+            return None
+        return max(0.0, self._first_at + self.max_delay - now)
+
+    def flush(self) -> Optional[bytes]:
+        if not self._buffer:
+            return None
+        batch = bytes(self._buffer)
+        self._buffer.clear()
+        self._first_at = None
+        self.batches_out += 1
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "frames_in": self.frames_in,
+            "batches_out": self.batches_out,
+        }
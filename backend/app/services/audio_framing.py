@@ -0,0 +1,102 @@
+import base64
+import json
+from typing import Any, Tuple
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from app.services import metrics
+
+# Clients opt into binary framing by offering this WebSocket subprotocol
+BINARY_SUBPROTOCOL = "aicall.pcm16.v1"
+
+# Binary frames carry a one-byte kind header followed by the payload
+FRAME_AUDIO = 0x01  # raw PCM16 little-endian, 24 kHz mono
+FRAME_CONTROL = 0x02  # UTF-8 JSON control message
+
+def encode_audio_frame(pcm: bytes) -> bytes:
+    return bytes((FRAME_AUDIO,)) + pcm
+
+def encode_control_frame(message: dict) -> bytes:
+    return bytes((FRAME_CONTROL,)) + json.dumps(message).encode("utf-8")
+
+def decode_frame(frame: bytes) -> Tuple[str, Any]:
+    if not frame:
+        raise ValueError("Empty frame")
+    kind = frame[0]
+    if kind == FRAME_AUDIO:
+        return "audio", frame[1:]
+    if kind == FRAME_CONTROL:
+        return "control", json.loads(frame[1:])
+    raise ValueError(f"Unknown frame kind {kind:#x}")
+
+def negotiate_binary(websocket: WebSocket) -> bool:
+    return BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+
+class ClientChannel:
+    """Browser leg of a realtime call in either binary or legacy JSON framing.
+
+    Audio always crosses this boundary as raw PCM16 bytes; base64 only
+    appears on the legacy JSON path and at the OpenAI boundary.
+    """
+
+    def __init__(self, websocket: WebSocket, binary: bool = False):
+        self.websocket = websocket
+        self.binary = binary
+
+    async def accept(self):
+        await self.websocket.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary else None)
+
+    async def receive(self) -> Tuple[str, Any]:
+        """Return ("audio", bytes) or ("control", dict)."""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        if message.get("bytes") is not None:
+            self._count("in", len(message["bytes"]))
+            return decode_frame(message["bytes"])
+
+        # Text frames are JSON in both modes
+        self._count("in", len(message["text"]))
+        data = json.loads(message["text"])
+        if data.get("type") == "audio":
+            return "audio", base64.b64decode(data["data"])
+        return "control", data
+
+    async def send_audio(self, pcm: bytes):
+        if self.binary:
+            await self._send_bytes(encode_audio_frame(pcm))
+        else:
+            await self._send_text(json.dumps({
+                "type": "audio",
+                "data": base64.b64encode(pcm).decode("ascii")
+            }))
+
+    async def send_control(self, message: dict):
+        if self.binary:
+            await self._send_bytes(encode_control_frame(message))
+        else:
+            await self._send_text(json.dumps(message))
+
+    async def _send_bytes(self, frame: bytes):
+        await self.websocket.send_bytes(frame)
+        self._count("out", len(frame))
+
+    async def _send_text(self, text: str):
+        await self.websocket.send_text(text)
+        self._count("out", len(text))
+
+    def _count(self, direction: str, size: int):
+        metrics.WS_MESSAGES.labels(leg="client", direction=direction).inc()
+        metrics.WS_BYTES.labels(leg="client", direction=direction).inc(size)
+
+    @property
+    def is_open(self) -> bool:
+        """False once the client hung up or we closed the socket."""
+        return (
+            self.websocket.client_state == WebSocketState.CONNECTED
+            and self.websocket.application_state == WebSocketState.CONNECTED
+        )
+
+    async def close(self, code: int = 1000, reason: str = None):
+        if self.is_open:
+            await self.websocket.close(code=code, reason=reason)
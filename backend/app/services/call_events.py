@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Set
+
+# Events that end a subscription; never dropped for a slow reader
+TERMINAL_EVENTS = ("call_complete", "error")
+
+def _evict_oldest_intermediate(queue: asyncio.Queue):
+    pending = []
+    while not queue.empty():
+        pending.append(queue.get_nowait())
+    for i, event in enumerate(pending):
+        if event.get("type") not in TERMINAL_EVENTS:
+            del pending[i]
+            break
+    else:
+        del pending[0]
+    for event in pending:
+        queue.put_nowait(event)
+
+class CallEventHub:
+    """In-process fan-out of per-call events (analysis results) to connected sockets."""
+
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, call_id: int):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.setdefault(call_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(call_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[call_id]
+
+    def publish(self, call_id: int, event: dict):
+        for queue in self._subscribers.get(call_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A subscriber that stopped reading must not hold up the job. It may
+                # miss intermediate events, but always gets the final outcome.
+                if event.get("type") in TERMINAL_EVENTS:
+                    _evict_oldest_intermediate(queue)
+                    queue.put_nowait(event)
+
+    def has_subscribers(self, call_id: int) -> bool:
+        return bool(self._subscribers.get(call_id))
+
+call_events = CallEventHub()
@@ -0,0 +1,172 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000  # PCM16 mono on both legs
+CHANNELS = ["caller", "persona"]  # Left, right
+MANIFEST = "manifest.json"
+LATE_FRAME_SLACK = SAMPLE_RATE // 2  # Caller frames reach us a little after they were spoken
+
+def recording_dir(call_id: int) -> str:
+    return os.path.join(settings.RECORDINGS_DIR, str(call_id))
+
+def load_manifest(call_id: int) -> Optional[dict]:
+    try:
+        with open(os.path.join(recording_dir(call_id), MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+class CallRecorder:
+    """Records both legs of a realtime call as stereo PCM16 (caller left, persona right).
+
+    The relay only calls add(), which is a put_nowait on a bounded queue: when
+    the writer falls behind, frames are dropped and counted instead of
+    slowing the call down. A writer task places each frame on a shared
+    timeline (no earlier than when it arrived, never overlapping the previous
+    frame on its channel), interleaves the channels and appends fixed-length
+    chunks under RECORDINGS_DIR/<call_id>/. Buffered audio per channel is
+    capped at RECORDING_MAX_BUFFER_SECONDS. Compression and file writes run
+    in a thread. manifest.json is rewritten after every chunk, so a crash
+    keeps everything up to the last chunk.
+    """
+
+    def __init__(self, call_id: int):
+        self.call_id = call_id
+        self.directory = recording_dir(call_id)
+        self.compress = settings.RECORDING_COMPRESS
+        self.chunk_samples = int(settings.RECORDING_CHUNK_SECONDS * SAMPLE_RATE)
+        # At least one chunk, so writing early always makes room
+        self.max_buffer_samples = max(self.chunk_samples, int(settings.RECORDING_MAX_BUFFER_SECONDS * SAMPLE_RATE))
+        self.chunks: List[dict] = []
+        self.dropped_frames = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.RECORDING_QUEUE_MAX_FRAMES)
+        self._started_at: Optional[float] = None
+        self._written = 0  # Samples per channel already written to chunks
+        self._cursor: Dict[str, int] = {channel: 0 for channel in CHANNELS}
+        # Samples from _written onwards, per channel; the persona usually runs ahead of real time
+        self._pending: Dict[str, bytearray] = {channel: bytearray() for channel in CHANNELS}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"call-{self.call_id}-recorder")
+
+    def add(self, channel: str, pcm: bytes, received_at: float):
+        """Queue a frame for recording. Never blocks."""
+        if self._task is None or not pcm:
+            return
+        try:
+            self._queue.put_nowait((channel, pcm, received_at))
+        except asyncio.QueueFull:
+            self.dropped_frames += 1
+
+    async def close(self) -> bool:
+        """Write the remaining audio and the final manifest. Returns whether anything was recorded."""
+        if self._task is None:
+            return False
+        if not self._task.done():
+            await self._queue.put(None)
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self.dropped_frames:
+            logger.warning("Call %s: recorder dropped %d frames", self.call_id, self.dropped_frames)
+        return bool(self.chunks)
+
+    async def _run(self):
+        try:
+            await asyncio.to_thread(os.makedirs, self.directory, exist_ok=True)
+            while True:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=settings.RECORDING_CHUNK_SECONDS)
+                except asyncio.TimeoutError:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    self._place(*item)
+                # A chunk is complete once real time has moved past its end
+                clock = self._sample_at(time.monotonic()) - LATE_FRAME_SLACK
+                while clock - self._written >= self.chunk_samples:
+                    await self._write_chunk(self.chunk_samples)
+                # A long reply arrives much faster than real time. Rather than hold it all,
+                # write ahead; the other channel is padded with silence, and its frames
+                # for that stretch land just after it.
+                while self._buffered_samples() >= self.max_buffer_samples:
+                    await self._write_chunk(self.chunk_samples)
+
+            # End of call: flush whatever is left, up to the longer channel
+            remaining = self._buffered_samples()
+            while remaining > 0:
+                samples = min(remaining, self.chunk_samples)
+                await self._write_chunk(samples)
+                remaining -= samples
+        except Exception:
+            logger.exception("Recording call %s failed", self.call_id)
+
+    def _buffered_samples(self) -> int:
+        return max(len(buffer) for buffer in self._pending.values()) // 2
+
+    def _sample_at(self, at: float) -> int:
+        return int((at - self._started_at) * SAMPLE_RATE)
+
+    def _place(self, channel: str, pcm: bytes, received_at: float):
+        start = max(self._cursor[channel], self._sample_at(received_at), self._written)
+        buffer = self._pending[channel]
+        gap = (start - self._written) * 2 - len(buffer)
+        if gap > 0:
+            buffer.extend(bytes(gap))
+        buffer.extend(pcm[:len(pcm) - len(pcm) % 2])
+        self._cursor[channel] = self._written + len(buffer) // 2
+
+    async def _write_chunk(self, samples: int):
+        tracks = []
+        for channel in CHANNELS:
+            buffer = self._pending[channel]
+            track = array("h", bytes(buffer[:samples * 2]).ljust(samples * 2, b"\0"))
+            del buffer[:samples * 2]
+            tracks.append(track)
+        stereo = array("h", bytes(samples * 4))
+        stereo[0::2] = tracks[0]
+        stereo[1::2] = tracks[1]
+        if sys.byteorder == "big":
+            stereo.byteswap()
+
+        index = len(self.chunks)
+        name = f"chunk-{index:05d}.pcm" + (".gz" if self.compress else "")
+        self.chunks.append({"file": name, "start_ms": self._written * 1000 // SAMPLE_RATE, "samples": samples})
+        self._written += samples
+        await asyncio.to_thread(self._write_files, name, stereo.tobytes(), self._manifest())
+
+    def _write_files(self, name: str, data: bytes, manifest: dict):
+        if self.compress:
+            data = gzip.compress(data, compresslevel=settings.RECORDING_COMPRESS_LEVEL)
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(data)
+        # Replace the manifest atomically so readers never see a partial one
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def _manifest(self) -> dict:
+        return {
+            "call_id": self.call_id,
+            "format": "pcm_s16le",
+            "sample_rate": SAMPLE_RATE,
+            "channels": CHANNELS,
+            "compression": "gzip" if self.compress else None,
+            "duration_ms": self._written * 1000 // SAMPLE_RATE,
+            "dropped_frames": self.dropped_frames,
+            "chunks": list(self.chunks),
+        }
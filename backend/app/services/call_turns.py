@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.call_turn import CallTurn
+
+logger = logging.getLogger(__name__)
+
+SPEAKER_LABELS = {"caller": "Caller", "persona": "Persona"}
+
+def format_transcript(turns) -> str:
+    """The Call.transcript text for (speaker, text) pairs in seq order."""
+    return "\n".join(f"{SPEAKER_LABELS.get(speaker, speaker)}: {text}" for speaker, text in turns)
+
+async def load_transcript(db: AsyncSession, call_id: int) -> str:
+    """Rebuild a call's transcript from its persisted turns, e.g. after the worker relaying it died."""
+    turns = (await db.execute(
+        select(CallTurn.speaker, CallTurn.text)
+        .where(CallTurn.call_id == call_id)
+        .order_by(CallTurn.seq)
+    )).all()
+    return format_transcript(turns)
+
+async def latest_turn(db: AsyncSession, call_id: int):
+    """(end_offset_ms, created_at) of the call's last saved turn, or None if it has none."""
+    return (await db.execute(
+        select(CallTurn.end_offset_ms, CallTurn.created_at)
+        .where(CallTurn.call_id == call_id)
+        .order_by(CallTurn.seq.desc())
+        .limit(1)
+    )).first()
+
+async def is_orphaned(db: AsyncSession, call) -> bool:
+    """Whether a call's relay died without saving it: never finalized and no turn saved for a while.
+
+    A call that is still being relayed keeps saving turns; its worker saves
+    the transcript and queues the analysis itself when the call ends.
+    """
+    if call.latency_stats is not None or call.duration is not None:
+        return False
+    last = await latest_turn(db, call.id)
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.CALL_ORPHANED_AFTER_SECONDS)
+    return last is not None and last.created_at < stale_before
+
+class TurnRecorder:
+    """Builds structured turns from Realtime API events and persists them while the call runs.
+
+    A turn gets its seq when it starts (caller: speech_started, persona: first
+    audio delta), so turns stay in spoken order even though the caller's
+    transcription usually completes after the persona has started replying.
+    Finished turns are buffered and written in small batches by a background
+    task, every TURN_FLUSH_BATCH turns or TURN_FLUSH_INTERVAL_SECONDS, each
+    batch in its own short session. Offsets are milliseconds from start().
+    """
+
+    def __init__(self, call_id: int):
+        self.call_id = call_id
+        self.turns: List[dict] = []  # Every finished turn, for the final transcript
+        self._started_at: Optional[float] = None
+        self._next_seq = 0
+        self._open: Dict[str, dict] = {}  # Turns awaiting their transcript, by conversation item id
+        self._speech_stopped_at: Optional[float] = None
+        self._pending: List[dict] = []  # Finished turns not yet written
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"call-{self.call_id}-turns")
+
+    async def close(self):
+        """Stop the flusher and write what is still buffered."""
+        # Let a batch that is being written finish rather than cancelling it
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._flush()
+        if self._pending:
+            logger.error("Call %s: %d turns could not be saved", self.call_id, len(self._pending))
+
+    def transcript(self) -> str:
+        turns = sorted(self.turns, key=lambda turn: turn["seq"])
+        return format_transcript((turn["speaker"], turn["text"]) for turn in turns)
+
+    def upstream_event(self, event_type: str, data: dict, received_at: float):
+        if event_type == "input_audio_buffer.speech_started":
+            self._open_turn(self._key(data, "caller"), "caller", received_at)
+        elif event_type == "input_audio_buffer.speech_stopped":
+            self._speech_stopped_at = received_at
+            turn = self._open.get(self._key(data, "caller"))
+            if turn is not None:
+                turn["end_offset_ms"] = self._offset(received_at)
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            turn = self._open.pop(self._key(data, "caller"), None) or self._new_turn("caller", None)
+            self._finish(turn, data.get("transcript", ""))
+        elif event_type == "response.audio.delta":
+            key = self._key(data, "persona")
+            if key not in self._open:
+                turn = self._open_turn(key, "persona", received_at)
+                if self._speech_stopped_at is not None:
+                    turn["latency_ms"] = round((received_at - self._speech_stopped_at) * 1000)
+                    self._speech_stopped_at = None
+        elif event_type == "response.audio_transcript.done":
+            turn = self._open.pop(self._key(data, "persona"), None) or self._new_turn("persona", None)
+            turn["end_offset_ms"] = self._offset(received_at)
+            self._finish(turn, data.get("transcript", ""))
+
+    @staticmethod
+    def _key(data: dict, speaker: str) -> str:
+        # Without an item id, events belong to the speaker's current open turn
+        return data.get("item_id") or f"current:{speaker}"
+
+    def _offset(self, at: float) -> Optional[int]:
+        if self._started_at is None:
+            return None
+        return max(0, round((at - self._started_at) * 1000))
+
+    def _new_turn(self, speaker: str, started_at: Optional[float]) -> dict:
+        turn = {
+            "call_id": self.call_id,
+            "seq": self._next_seq,
+            "speaker": speaker,
+            "start_offset_ms": self._offset(started_at) if started_at is not None else None,
+            "end_offset_ms": None,
+            "latency_ms": None,
+        }
+        self._next_seq += 1
+        return turn
+
+    def _open_turn(self, key: str, speaker: str, started_at: float) -> dict:
+        turn = self._new_turn(speaker, started_at)
+        self._open[key] = turn
+        return turn
+
+    def _finish(self, turn: dict, text: str):
+        turn["text"] = text
+        self.turns.append(turn)
+        self._pending.append(turn)
+        if len(self._pending) >= settings.TURN_FLUSH_BATCH:
+            self._wake.set()
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.TURN_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closed:
+                break
+            await self._flush()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(CallTurn), batch)
+                await db.commit()
+        except Exception:
+            # Keep the batch for the next attempt; a failed commit wrote nothing
+            logger.exception("Saving turns for call %s failed", self.call_id)
+            self._pending = batch + self._pending
@@ -0,0 +1,57 @@
+import hashlib
+from typing import List, Tuple
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.persona import Persona
+from app.models.script import Script
+from app.schemas.script import ScriptResponse
+from app.utils.cache import LRUCache
+
+_CATALOG_KEY = "scripts"
+_adapter = TypeAdapter(List[ScriptResponse])
+
+# Serialized catalog and its ETag. The TTL bounds staleness for writes made by other workers.
+_cache = LRUCache(1, ttl=settings.CATALOG_CACHE_TTL_SECONDS)
+_generation = 0
+
+def invalidate_catalog():
+    """Drop the cached catalog. Call after any write to scripts or personas."""
+    global _generation
+    _generation += 1
+    _cache.pop(_CATALOG_KEY)
+
+async def get_catalog() -> Tuple[str, bytes]:
+    """Return (etag, JSON body) for the full script catalog, loading it at most once per invalidation."""
+    cached = _cache.get(_CATALOG_KEY)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    async with AsyncSessionLocal() as db:
+        # One round trip; personas are ordered too so the ETag is stable across reloads
+        scripts = (await db.scalars(
+            select(Script)
+            .outerjoin(Script.personas)
+            .options(contains_eager(Script.personas))
+            .order_by(Script.id, Persona.id)
+        )).unique().all()
+        body = _adapter.dump_json(_adapter.validate_python(scripts, from_attributes=True))
+
+    entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+    # Don't cache a snapshot that a concurrent write has already invalidated
+    if generation == _generation:
+        _cache.set(_CATALOG_KEY, entry)
+    return entry
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header, as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, Iterable, Optional, Set
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Bounded in-process worker pool for jobs whose state lives in the database.
+
+    The queue only carries job keys. Handlers claim and update the job row
+    themselves, so a key that is dropped (queue full, worker restart) is
+    picked up again by the periodic sweep instead of being lost.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Hashable], Awaitable[None]],
+        workers: int,
+        max_size: int,
+        on_failure: Optional[Callable[[Hashable, Exception], Awaitable[bool]]] = None,
+        sweep: Optional[Callable[[], Awaitable[Iterable[Hashable]]]] = None,
+        sweep_interval: float = 30.0,
+        retry_delay: float = 5.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.on_failure = on_failure
+        self.sweep = sweep
+        self.sweep_interval = sweep_interval
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._queued: Set[Hashable] = set()
+        self._failures: dict = {}
+        self._tasks: list = []
+        metrics.JOB_QUEUE_DEPTH.labels(queue=name).set_function(lambda: self.depth)
+
+    async def start(self):
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}"))
+        if self.sweep:
+            self._tasks.append(asyncio.create_task(self._sweeper(), name=f"{self.name}-sweeper"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, key: Hashable) -> bool:
+        """Queue a job key. Returns False if it is already queued or the queue is full."""
+        if key in self._queued:
+            return False
+        try:
+            self.queue.put_nowait(key)
+        except asyncio.QueueFull:
+            # The job row stays pending; the sweeper will retry it
+            return False
+        self._queued.add(key)
+        return True
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def _worker(self):
+        while True:
+            key = await self.queue.get()
+            try:
+                await self.handler(key)
+                self._failures.pop(key, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[%s] job %s failed: %s", self.name, key, e)
+                retry = await self.on_failure(key, e) if self.on_failure else False
+                if retry:
+                    failures = self._failures.get(key, 0) + 1
+                    self._failures[key] = failures
+                    delay = self.retry_delay * (2 ** (failures - 1))
+                    asyncio.get_running_loop().call_later(delay, self.submit, key)
+                else:
+                    self._failures.pop(key, None)
+            finally:
+                self._queued.discard(key)
+                self.queue.task_done()
+
+    async def _sweeper(self):
+        while True:
+            try:
+                for key in await self.sweep():
+                    self.submit(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[%s] sweep failed", self.name)
+            await asyncio.sleep(self.sweep_interval)
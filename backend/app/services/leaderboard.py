@@ -0,0 +1,100 @@
+import asyncio
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.models.user_stats import UserStats
+
+class LeaderboardEntryData:
+    __slots__ = ("user_id", "email", "total_calls", "avg_score")
+
+    def __init__(self, user_id: int, email: str, total_calls: int, avg_score: float):
+        self.user_id = user_id
+        self.email = email
+        self.total_calls = total_calls
+        self.avg_score = avg_score
+
+    @property
+    def sort_key(self) -> Tuple[float, int]:
+        # Highest average first; user id breaks ties so ranks are stable
+        return (-self.avg_score, self.user_id)
+
+class Leaderboard:
+    """Ranked users kept sorted in memory.
+
+    Scoring a call updates one entry in place; a full reload from the database
+    only happens when the snapshot is older than LEADERBOARD_TTL_SECONDS, which
+    also picks up calls scored by other worker processes. Rank lookups are a
+    binary search over the sorted keys.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._keys: List[Tuple[float, int]] = []
+        self._entries: Dict[int, LeaderboardEntryData] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_fresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(UserStats.user_id, User.email, UserStats.total_calls, UserStats.avg_score)
+                    .join(User, User.id == UserStats.user_id)
+                    .where(UserStats.total_calls > 0)
+                )).all()
+            entries = {row.user_id: LeaderboardEntryData(*row) for row in rows}
+            self._entries = entries
+            self._keys = sorted(entry.sort_key for entry in entries.values())
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def record(self, user_id: int, email: str, total_calls: int, avg_score: float):
+        """Apply a user's new stats after a call is scored."""
+        if self._loaded_at is None:
+            # Nothing loaded yet; the next read does a full load
+            return
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            index = bisect_left(self._keys, entry.sort_key)
+            if index < len(self._keys) and self._keys[index] == entry.sort_key:
+                del self._keys[index]
+            entry.email = email
+            entry.total_calls = total_calls
+            entry.avg_score = avg_score
+        else:
+            entry = LeaderboardEntryData(user_id, email, total_calls, avg_score)
+            self._entries[user_id] = entry
+        if total_calls > 0:
+            insort(self._keys, entry.sort_key)
+        else:
+            del self._entries[user_id]
+
+    async def page(self, offset: int, limit: int) -> List[Tuple[int, LeaderboardEntryData]]:
+        """Return (rank, entry) pairs for one page."""
+        await self._ensure_fresh()
+        keys = self._keys[offset:offset + limit]
+        return [(offset + i + 1, self._entries[user_id]) for i, (_, user_id) in enumerate(keys)]
+
+    async def rank_of(self, user_id: int) -> Optional[Tuple[int, LeaderboardEntryData]]:
+        await self._ensure_fresh()
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return bisect_left(self._keys, entry.sort_key) + 1, entry
+
+    async def size(self) -> int:
+        await self._ensure_fresh()
+        return len(self._keys)
+
+leaderboard = Leaderboard(settings.LEADERBOARD_TTL_SECONDS)
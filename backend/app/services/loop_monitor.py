@@ -0,0 +1,45 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+from app.services import metrics
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a short sleep wakes up compared to when it was due."""
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.samples.append(lag)
+            metrics.EVENT_LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p99_ms": round(samples[max(0, int(len(samples) * 0.99) - 1)] * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,117 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics are per worker process; scrape each worker or run a single worker per container
+
+# Buckets sized for conversational latency: tens of ms up to several seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# LLM calls take seconds to minutes
+LLM_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0)
+
+# Waits that should be near zero and only grow under saturation
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# HTTP
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by router and route template",
+    ["router", "method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+# Realtime calls
+
+ACTIVE_CALLS = Gauge(
+    "realtime_active_calls",
+    "Realtime calls currently relaying in this worker"
+)
+
+WS_MESSAGES = Counter(
+    "realtime_ws_messages_total",
+    "WebSocket messages on each leg of a realtime call",
+    ["leg", "direction"]
+)
+
+WS_BYTES = Counter(
+    "realtime_ws_bytes_total",
+    "WebSocket payload bytes on each leg of a realtime call",
+    ["leg", "direction"]
+)
+
+TURN_LATENCY = Histogram(
+    "realtime_turn_latency_seconds",
+    "Time from end of caller speech to each stage of the persona's reply",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+RELAY_DWELL = Histogram(
+    "realtime_relay_dwell_seconds",
+    "Time a frame spends in the relay between being read from one leg and written to the other",
+    ["direction"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+# LLM
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Chat completion latency, excluding time spent waiting for a concurrency slot",
+    ["operation", "outcome"],
+    buckets=LLM_BUCKETS
+)
+
+LLM_FIRST_TOKEN = Histogram(
+    "llm_first_token_seconds",
+    "Time from sending a streamed completion to its first content token",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+
+LLM_SLOT_WAIT = Histogram(
+    "llm_slot_wait_seconds",
+    "Time spent waiting for a slot under OPENAI_MAX_CONCURRENT_REQUESTS",
+    ["operation"],
+    buckets=WAIT_BUCKETS
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the API",
+    ["operation", "kind"]
+)
+
+# Database
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the async engine pool",
+    buckets=WAIT_BUCKETS
+)
+
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the async engine pool"
+)
+
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_connections_capacity",
+    "Maximum connections the async engine pool will open (pool size + overflow)"
+)
+
+# Background jobs
+
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Job keys waiting for a worker",
+    ["queue"]
+)
+
+# Event loop
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late a periodic sleep wakes up compared to when it was due",
+    buckets=WAIT_BUCKETS
+)
@@ -1,13 +1,139 @@
+import asyncio
 import json
-from openai import OpenAI
+import time
+from typing import Callable, List, Optional
+import httpx
+from openai import AsyncOpenAI
 from app.config import settings
+from app.services import metrics
+from app.utils.json_stream import JSONObjectStreamParser
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# Receives ("value", key, value) and ("delta", key, text) events while a JSON response streams in
+StreamCallback = Callable[[str, Optional[str], object], None]
 
-async def generate_personas(script_content: str) -> list:
-    """Generate 3 personas (easy, medium, hard) based on the script using GPT-5 Thinking."""
+class OpenAIService:
+    """Shared async OpenAI client with a pooled transport and a concurrency cap."""
+
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENAI_TIMEOUT_SECONDS,
+                connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=self.http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
+        self.semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENT_REQUESTS)
+
+    async def close(self):
+        await self.client.close()
+
+    async def chat_json(
+        self,
+        operation: str,
+        system: str,
+        prompt: str,
+        temperature: float,
+        timeout: Optional[float] = None
+    ) -> dict:
+        """Run a JSON-mode chat completion, waiting for a free slot under the concurrency cap.
+
+        `operation` labels the latency and token metrics (e.g. "analyze_call").
+        """
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            started = time.perf_counter()
+            metrics.LLM_SLOT_WAIT.labels(operation=operation).observe(started - queued_at)
+            outcome = "error"
+            try:
+                response = await self.client.chat.completions.create(
+                    model="gpt-4o",  # Using GPT-4o as a fallback - update to gpt-5-thinking when available
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    timeout=timeout or settings.OPENAI_TIMEOUT_SECONDS
+                )
+                outcome = "ok"
+            finally:
+                metrics.LLM_LATENCY.labels(operation=operation, outcome=outcome).observe(time.perf_counter() - started)
+
+        if response.usage:
+            metrics.LLM_TOKENS.labels(operation=operation, kind="prompt").inc(response.usage.prompt_tokens)
+            metrics.LLM_TOKENS.labels(operation=operation, kind="completion").inc(response.usage.completion_tokens)
+        return json.loads(response.choices[0].message.content)
+
+    async def chat_json_stream(
+        self,
+        operation: str,
+        system: str,
+        prompt: str,
+        temperature: float,
+        on_event: StreamCallback,
+        timeout: Optional[float] = None
+    ) -> dict:
+        """Like chat_json, but streams the completion and reports top-level fields as they are parsed.
+
+        The returned dict is parsed from the full text, so it is identical to
+        what chat_json would have returned.
+        """
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            started = time.perf_counter()
+            metrics.LLM_SLOT_WAIT.labels(operation=operation).observe(started - queued_at)
+            outcome = "error"
+            parser = JSONObjectStreamParser()
+            content = []
+            usage = None
+            try:
+                stream = await self.client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    timeout=timeout or settings.OPENAI_TIMEOUT_SECONDS
+                )
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if not content:
+                        metrics.LLM_FIRST_TOKEN.labels(operation=operation).observe(time.perf_counter() - started)
+                    content.append(text)
+                    for kind, key, value in parser.feed(text):
+                        on_event(kind, key, value)
+                outcome = "ok"
+            finally:
+                metrics.LLM_LATENCY.labels(operation=operation, outcome=outcome).observe(time.perf_counter() - started)
+
+        if usage:
+            metrics.LLM_TOKENS.labels(operation=operation, kind="prompt").inc(usage.prompt_tokens)
+            metrics.LLM_TOKENS.labels(operation=operation, kind="completion").inc(usage.completion_tokens)
+        return json.loads("".join(content))
+
+    async def generate_personas(self, script_content: str, difficulties: Optional[List[str]] = None) -> list:
+        """Generate 3 personas (easy, medium, hard) based on the script using GPT-5 Thinking.
+
+        Pass `difficulties` to only ask for the levels that are still missing.
+        """
     
-    prompt = f"""Analyze this cold call pitch script and create 3 different personas that a salesperson might encounter when using this script. Each persona should have a different difficulty level.
+        prompt = f"""Analyze this cold call pitch script and create 3 different personas that a salesperson might encounter when using this script. Each persona should have a different difficulty level.
 
 Script:
 {script_content}
@@ -32,34 +158,41 @@ Return the response as a JSON array with exactly 3 personas in this format:
   }},
   ...
 ]"""
+        if difficulties:
+            prompt += f"\n\nOnly return the personas for these difficulty levels: {', '.join(difficulties)}."
 
-    response = client.chat.completions.create(
-        model="gpt-4o",  # Using GPT-4o as a fallback - update to gpt-5-thinking when available
-        messages=[
-            {"role": "system", "content": "You are an expert in sales psychology and persona creation. Always return valid JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.8,
-        response_format={"type": "json_object"}
-    )
+        result = await self.chat_json(
+            "generate_personas",
+            "You are an expert in sales psychology and persona creation. Always return valid JSON.",
+            prompt,
+            temperature=0.8
+        )
     
-    result = json.loads(response.choices[0].message.content)
+        # Handle both array and object responses
+        if isinstance(result, dict) and "personas" in result:
+            personas = result["personas"]
+        elif isinstance(result, list):
+            personas = result
+        else:
+            # Fallback: extract personas from the result
+            personas = [result.get("easy"), result.get("medium"), result.get("hard")]
     
-    # Handle both array and object responses
-    if isinstance(result, dict) and "personas" in result:
-        personas = result["personas"]
-    elif isinstance(result, list):
-        personas = result
-    else:
-        # Fallback: extract personas from the result
-        personas = [result.get("easy"), result.get("medium"), result.get("hard")]
-    
-    return personas
+        return personas
+
+    async def analyze_call(
+        self,
+        transcript: str,
+        script_content: str,
+        persona_name: str,
+        on_event: Optional[StreamCallback] = None
+    ) -> dict:
+        """Analyze a call transcript and provide detailed feedback using GPT-5 Thinking.
 
-async def analyze_call(transcript: str, script_content: str, persona_name: str) -> dict:
-    """Analyze a call transcript and provide detailed feedback using GPT-5 Thinking."""
+        With `on_event` the completion is streamed: scores are reported as soon
+        as they are parsed and the feedback text as it is generated.
+        """
     
-    prompt = f"""Analyze this cold call practice session and provide detailed constructive feedback.
+        prompt = f"""Analyze this cold call practice session and provide detailed constructive feedback.
 
 ORIGINAL SCRIPT:
 {script_content}
@@ -85,20 +218,42 @@ Provide your analysis in the following JSON format:
   "value_delivery": <0-100>,
   "outcome": "success|partial|failure",
   "feedback": "Detailed constructive feedback with specific examples and actionable suggestions for improvement"
-}}"""
-
-    response = client.chat.completions.create(
-        model="gpt-4o",  # Using GPT-4o as a fallback - update to gpt-5-thinking when available
-        messages=[
-            {"role": "system", "content": "You are an expert sales coach providing constructive feedback. Always return valid JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        response_format={"type": "json_object"}
-    )
-    
-    analysis = json.loads(response.choices[0].message.content)
-    return analysis
+}}
+
+Keep the fields in this order, with "feedback" last."""
+
+        system = "You are an expert sales coach providing constructive feedback. Always return valid JSON."
+        if on_event is not None:
+            return await self.chat_json_stream("analyze_call", system, prompt, temperature=0.7, on_event=on_event)
+
+        analysis = await self.chat_json(
+            "analyze_call",
+            system,
+            prompt,
+            temperature=0.7
+        )
+        return analysis
+
+_service: Optional[OpenAIService] = None
+
+def init_openai_service() -> OpenAIService:
+    """Build the shared service. Called once from the app lifespan."""
+    global _service
+    if _service is None:
+        _service = OpenAIService()
+    return _service
+
+async def close_openai_service():
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
+
+def get_openai_service() -> OpenAIService:
+    """Dependency returning the shared OpenAI service."""
+    if _service is None:
+        raise RuntimeError("OpenAI service is not initialized")
+    return _service
 
 def create_persona_system_prompt(persona_data: dict) -> str:
     """Create a system prompt for the Realtime API to act as a specific persona."""
@@ -0,0 +1,179 @@
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.script import Script
+from app.models.persona import Persona, DifficultyLevel
+from app.models.analysis_job import JobStatus
+from app.services.job_queue import JobQueue
+from app.services.openai_service import get_openai_service
+from app.services.persona_prompts import compile_persona_prompt
+from app.services.catalog import invalidate_catalog
+
+_queue: Optional[JobQueue] = None
+
+async def enqueue_persona_generation(db: AsyncSession, script: Script):
+    """Mark a script's personas as pending and hand it to the workers."""
+    if script.persona_status in (JobStatus.FAILED, JobStatus.COMPLETED):
+        script.persona_status = JobStatus.PENDING
+        script.persona_attempts = 0
+        script.persona_error = None
+        script.persona_updated_at = datetime.utcnow()
+        await db.commit()
+        invalidate_catalog()
+
+    if script.persona_status == JobStatus.PENDING:
+        get_persona_queue().submit(script.id)
+
+async def _claim_script(db: AsyncSession, script_id: int) -> bool:
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    result = await db.execute(
+        update(Script)
+        .where(
+            Script.id == script_id,
+            or_(
+                Script.persona_status == JobStatus.PENDING,
+                # Reclaiming an abandoned run counts as an attempt
+                and_(
+                    Script.persona_status == JobStatus.RUNNING,
+                    Script.persona_updated_at < stale_before,
+                    Script.persona_attempts < settings.PERSONA_MAX_ATTEMPTS
+                )
+            )
+        )
+        .values(persona_status=JobStatus.RUNNING, persona_attempts=Script.persona_attempts + 1, persona_updated_at=now)
+    )
+    await db.commit()
+    if result.rowcount == 1:
+        invalidate_catalog()
+    return result.rowcount == 1
+
+async def _existing_difficulties(db: AsyncSession, script_id: int) -> set:
+    result = await db.scalars(select(Persona.difficulty).where(Persona.script_id == script_id))
+    return set(result.all())
+
+async def run_persona_job(script_id: int):
+    """Generate whichever difficulty levels a script is still missing.
+
+    Levels that already exist are never regenerated, so a retry after a
+    partial failure only pays for the missing personas.
+    """
+    async with AsyncSessionLocal() as db:
+        if not await _claim_script(db, script_id):
+            return
+        script = await db.get(Script, script_id)
+        script_content = script.content
+        existing = await _existing_difficulties(db, script_id)
+        missing = [d for d in DifficultyLevel if d not in existing]
+
+    personas_data = []
+    if missing:
+        personas_data = await get_openai_service().generate_personas(script_content, [d.value for d in missing])
+
+    async with AsyncSessionLocal() as db:
+        existing = await _existing_difficulties(db, script_id)
+        for persona_data in personas_data:
+            if not persona_data:
+                continue
+            difficulty = DifficultyLevel(str(persona_data["difficulty"]).lower())
+            if difficulty in existing:
+                continue
+            persona = Persona(
+                script_id=script_id,
+                difficulty=difficulty,
+                name=persona_data["name"],
+                personality=persona_data["personality"] if isinstance(persona_data["personality"], str) else json.dumps(persona_data["personality"]),
+                objections=persona_data["objections"] if isinstance(persona_data["objections"], str) else json.dumps(persona_data["objections"])
+            )
+            # Compile the realtime prompt now so call connects do no JSON work
+            compile_persona_prompt(persona)
+            db.add(persona)
+            existing.add(difficulty)
+        await db.commit()
+
+        still_missing = [d.value for d in DifficultyLevel if d not in existing]
+        if still_missing:
+            raise ValueError(f"No persona generated for: {', '.join(still_missing)}")
+
+        script = await db.get(Script, script_id)
+        script.persona_status = JobStatus.COMPLETED
+        script.persona_error = None
+        script.persona_updated_at = datetime.utcnow()
+        await db.commit()
+    invalidate_catalog()
+
+async def _on_job_failure(script_id: int, error: Exception) -> bool:
+    async with AsyncSessionLocal() as db:
+        script = await db.get(Script, script_id)
+        if script is None:
+            return False
+        retry = script.persona_attempts < settings.PERSONA_MAX_ATTEMPTS
+        script.persona_status = JobStatus.PENDING if retry else JobStatus.FAILED
+        script.persona_error = str(error)
+        script.persona_updated_at = datetime.utcnow()
+        await db.commit()
+    invalidate_catalog()
+    return retry
+
+async def _sweep_scripts() -> List[int]:
+    now = datetime.utcnow()
+    pending_before = now - timedelta(seconds=settings.JOB_SWEEP_INTERVAL_SECONDS)
+    stale_before = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        # Runs that keep dying with their worker stop once they are out of attempts
+        exhausted = await db.execute(
+            update(Script)
+            .where(
+                Script.persona_status == JobStatus.RUNNING,
+                Script.persona_updated_at < stale_before,
+                Script.persona_attempts >= settings.PERSONA_MAX_ATTEMPTS
+            )
+            .values(
+                persona_status=JobStatus.FAILED,
+                persona_error="Abandoned by its worker too many times",
+                persona_updated_at=now
+            )
+        )
+        await db.commit()
+        if exhausted.rowcount:
+            invalidate_catalog()
+
+        result = await db.scalars(
+            select(Script.id)
+            .where(or_(
+                and_(Script.persona_status == JobStatus.PENDING, Script.persona_updated_at < pending_before),
+                and_(Script.persona_status == JobStatus.RUNNING, Script.persona_updated_at < stale_before)
+            ))
+            .order_by(Script.id)
+            .limit(settings.PERSONA_QUEUE_SIZE)
+        )
+        return list(result.all())
+
+def get_persona_queue() -> JobQueue:
+    if _queue is None:
+        raise RuntimeError("Persona pipeline is not running")
+    return _queue
+
+async def start_persona_pipeline():
+    global _queue
+    _queue = JobQueue(
+        "personas",
+        run_persona_job,
+        workers=settings.PERSONA_WORKERS,
+        max_size=settings.PERSONA_QUEUE_SIZE,
+        on_failure=_on_job_failure,
+        sweep=_sweep_scripts,
+        sweep_interval=settings.JOB_SWEEP_INTERVAL_SECONDS,
+        retry_delay=settings.PERSONA_RETRY_DELAY_SECONDS
+    )
+    await _queue.start()
+
+async def stop_persona_pipeline():
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
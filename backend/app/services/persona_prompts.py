@@ -0,0 +1,54 @@
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.call import Call
+from app.models.persona import Persona
+from app.services.openai_service import create_persona_system_prompt
+from app.utils.cache import LRUCache
+
+# Bump when create_persona_system_prompt changes; stored prompts of older versions are recompiled
+PERSONA_PROMPT_VERSION = 1
+
+# (persona_id, prompt_version) -> compiled system prompt
+_prompt_cache = LRUCache(settings.PERSONA_PROMPT_CACHE_SIZE)
+
+def compile_persona_prompt(persona: Persona) -> str:
+    """Render a persona's realtime system prompt and stamp it on the row."""
+    persona.system_prompt = create_persona_system_prompt({
+        "name": persona.name,
+        "difficulty": persona.difficulty.value,
+        "personality": persona.personality,
+        "objections": persona.objections
+    })
+    persona.prompt_version = PERSONA_PROMPT_VERSION
+    return persona.system_prompt
+
+async def get_call_prompt(db: AsyncSession, call_id: int) -> Optional[Tuple[int, str]]:
+    """Return (persona_id, system prompt) for a call, or None if the call does not exist.
+
+    The common path is one indexed lookup of the call's persona id and prompt
+    version followed by a cache hit. Personas created before prompts were
+    stored, or compiled by an older template, are recompiled once and saved.
+    """
+    row = (await db.execute(
+        select(Call.persona_id, Persona.prompt_version)
+        .join(Persona, Persona.id == Call.persona_id)
+        .where(Call.id == call_id)
+    )).first()
+    if row is None:
+        return None
+
+    persona_id, version = row
+    if version == PERSONA_PROMPT_VERSION:
+        prompt = _prompt_cache.get((persona_id, version))
+        if prompt is not None:
+            return persona_id, prompt
+
+    persona = await db.get(Persona, persona_id)
+    if persona.prompt_version != PERSONA_PROMPT_VERSION or not persona.system_prompt:
+        compile_persona_prompt(persona)
+        await db.commit()
+
+    _prompt_cache.set((persona_id, PERSONA_PROMPT_VERSION), persona.system_prompt)
+    return persona_id, persona.system_prompt
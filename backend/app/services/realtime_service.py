@@ -1,61 +1,150 @@
 import asyncio
 import json
 import base64
+import logging
+import time
 import websockets
-from fastapi import WebSocket
 from datetime import datetime
+from fastapi import WebSocketDisconnect
 from app.config import settings
+from app.services.audio_framing import ClientChannel
+from app.services.relay_queue import RelayQueue, RelayItem, RelayQueueClosed
+from app.services.audio_coalescer import AudioCoalescer
+from app.services.turn_latency import TurnLatencyTracker
+from app.services.call_turns import TurnRecorder
+from app.services.call_recorder import CallRecorder
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
 
 class RealtimeCallHandler:
-    """Handler for OpenAI Realtime API voice calls."""
-    
-    def __init__(self, client_websocket: WebSocket, system_prompt: str):
-        self.client_ws = client_websocket
+    """Handler for OpenAI Realtime API voice calls.
+
+    Each direction is a reader task feeding a bounded RelayQueue and a writer
+    task draining it, so a slow peer on one leg never stalls reading from the
+    other. What happens when a queue fills up is set by its overflow policy.
+    """
+
+    # Calls currently relaying in this worker process
+    active_calls = 0
+
+    def __init__(self, client: ClientChannel, system_prompt: str, call_id: int):
+        self.client = client
         self.system_prompt = system_prompt
         self.openai_ws = None
-        self.transcript = []
+        # Turns are saved as they finish, so a crash mid-call keeps the conversation so far
+        self.turns = TurnRecorder(call_id)
+        self.recorder = CallRecorder(call_id) if settings.RECORDING_ENABLED else None
+        self.recorded = False
         self.start_time = None
         self.duration = 0
-        
+        self.to_openai = RelayQueue(
+            "client_to_openai",
+            settings.RELAY_QUEUE_MAX_FRAMES,
+            settings.RELAY_OPENAI_OVERFLOW_POLICY,
+            settings.RELAY_MAX_COALESCED_BYTES
+        )
+        self.to_client = RelayQueue(
+            "openai_to_client",
+            settings.RELAY_QUEUE_MAX_FRAMES,
+            settings.RELAY_CLIENT_OVERFLOW_POLICY,
+            settings.RELAY_MAX_COALESCED_BYTES
+        )
+        self.input_coalescer = AudioCoalescer(
+            settings.INPUT_AUDIO_COALESCE_MS,
+            settings.INPUT_AUDIO_COALESCE_BYTES
+        )
+        self.flush_input = asyncio.Event()
+        self.latency = TurnLatencyTracker()
+
     async def handle_call(self) -> str:
         """Handle the entire call session."""
         self.start_time = datetime.utcnow()
-        
+        self.turns.start()
+        if self.recorder is not None:
+            self.recorder.start()
+
         # Connect to OpenAI Realtime API
-        openai_url = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
+        openai_url = settings.OPENAI_REALTIME_URL
         headers = {
             "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
             "OpenAI-Beta": "realtime=v1"
         }
-        
+
         try:
             async with websockets.connect(openai_url, extra_headers=headers) as openai_ws:
                 self.openai_ws = openai_ws
-                
+
                 # Send session configuration
                 await self.configure_session()
-                
-                # Create tasks for bidirectional streaming
-                client_to_openai = asyncio.create_task(self.forward_client_to_openai())
-                openai_to_client = asyncio.create_task(self.forward_openai_to_client())
-                
-                # Wait for both tasks
-                await asyncio.gather(client_to_openai, openai_to_client, return_exceptions=True)
-                
+
+                RealtimeCallHandler.active_calls += 1
+                metrics.ACTIVE_CALLS.inc()
+                try:
+                    await self.relay()
+                finally:
+                    RealtimeCallHandler.active_calls -= 1
+                    metrics.ACTIVE_CALLS.dec()
+
         except Exception as e:
-            print(f"Error in Realtime API: {e}")
-            await self.client_ws.send_json({
-                "type": "error",
-                "message": f"Connection error: {str(e)}"
-            })
-        
+            logger.exception("Error in Realtime API")
+            if self.client.is_open:
+                await self.client.send_control({
+                    "type": "error",
+                    "message": f"Connection error: {str(e)}"
+                })
+
+        await self.turns.close()
+        if self.recorder is not None:
+            self.recorded = await self.recorder.close()
+
         # Calculate duration
         end_time = datetime.utcnow()
         self.duration = int((end_time - self.start_time).total_seconds())
-        
+
+        stats = self.relay_stats()
+        if stats["client_to_openai"]["dropped_frames"] or stats["openai_to_client"]["dropped_frames"]:
+            logger.warning("Realtime relay dropped audio frames: %s", stats)
+
         # Return transcript as string
-        return "\n".join(self.transcript)
-    
+        return self.turns.transcript()
+
+    async def relay(self):
+        """Run both legs until either side ends the call, then drain what is queued."""
+        readers = [
+            asyncio.create_task(self.forward_client_to_openai()),
+            asyncio.create_task(self.forward_openai_to_client())
+        ]
+        writers = [
+            asyncio.create_task(self.send_to_openai()),
+            asyncio.create_task(self.send_to_client())
+        ]
+
+        await asyncio.wait(readers + writers, return_when=asyncio.FIRST_COMPLETED)
+
+        # One leg is done: stop reading and give queued frames a moment to flush
+        for task in readers:
+            task.cancel()
+        self.to_openai.close()
+        self.to_client.close()
+        await asyncio.wait(writers, timeout=settings.RELAY_DRAIN_TIMEOUT_SECONDS)
+        for task in writers:
+            task.cancel()
+        await asyncio.gather(*readers, *writers, return_exceptions=True)
+
+    def relay_stats(self) -> dict:
+        return {
+            "client_to_openai": self.to_openai.stats(),
+            "openai_to_client": self.to_client.stats(),
+            "input_coalescing": self.input_coalescer.stats(),
+        }
+
+    def latency_summary(self) -> dict:
+        """Per-call latency stats saved on the Call row."""
+        summary = self.latency.summary()
+        summary["relay"] = self.relay_stats()
+        return summary
+
     async def configure_session(self):
         """Configure the Realtime API session with persona."""
         config = {
@@ -77,80 +166,174 @@ class RealtimeCallHandler:
                 }
             }
         }
-        await self.openai_ws.send(json.dumps(config))
-    
+        await self.send_upstream(config)
+
     async def forward_client_to_openai(self):
-        """Forward audio from client to OpenAI."""
+        """Read audio from the client onto the upstream queue."""
         try:
             while True:
-                message = await self.client_ws.receive_json()
-                
-                if message.get("type") == "audio":
-                    # Forward audio data to OpenAI
-                    await self.openai_ws.send(json.dumps({
-                        "type": "input_audio_buffer.append",
-                        "audio": message["data"]
-                    }))
-                    
-                elif message.get("type") == "end_call":
+                kind, payload = await self.client.receive()
+
+                if kind == "audio":
+                    item = RelayItem("audio", payload)
+                    self.latency.client_audio(item.received_at)
+                    if self.recorder is not None:
+                        self.recorder.add("caller", payload, item.received_at)
+                    await self.to_openai.put(item)
+
+                elif payload.get("type") == "end_call":
                     # Client ended the call
                     break
-                    
-        except Exception as e:
-            print(f"Error forwarding client to OpenAI: {e}")
-    
+
+        except RelayQueueClosed:
+            pass
+        except WebSocketDisconnect:
+            # Hanging up is an ordinary way for a call to end
+            logger.info("Client hung up")
+        except Exception:
+            logger.exception("Error forwarding client to OpenAI")
+
+    async def send_to_openai(self):
+        """Drain the upstream queue into the OpenAI socket, batching input audio."""
+        loop = asyncio.get_running_loop()
+        # Kept across iterations so a wakeup for a flush never abandons a pending get
+        next_item = None
+        try:
+            while True:
+                if not self.input_coalescer.pending:
+                    # Nothing buffered, so there is nothing a flush request could release
+                    self.flush_input.clear()
+                    item = await (next_item or self.to_openai.get())
+                    next_item = None
+                else:
+                    if next_item is None:
+                        next_item = asyncio.ensure_future(self.to_openai.get())
+                    flush_requested = asyncio.ensure_future(self.flush_input.wait())
+                    # No timeout when batching by size only
+                    await asyncio.wait(
+                        (next_item, flush_requested),
+                        timeout=self.input_coalescer.time_until_flush(loop.time()),
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    flush_requested.cancel()
+                    if not next_item.done():
+                        # Deadline passed or the caller stopped speaking: release the batch
+                        self.flush_input.clear()
+                        await self.append_input_audio(self.input_coalescer.flush())
+                        continue
+                    item = next_item.result()
+                    next_item = None
+
+                if item.kind == "audio":
+                    # Queue dwell only; the batching window is reported in input_coalescing
+                    self.latency.relayed("client_to_openai", item.received_at)
+                    await self.append_input_audio(self.input_coalescer.add(item.payload, loop.time()))
+                    continue
+
+                # Control events release the pending batch first
+                await self.append_input_audio(self.input_coalescer.flush())
+                await self.send_upstream(item.payload)
+        except RelayQueueClosed:
+            # End of call: send whatever audio is still buffered
+            await self.append_input_audio(self.input_coalescer.flush())
+        except Exception:
+            logger.exception("Error sending to OpenAI")
+        finally:
+            if next_item is not None:
+                next_item.cancel()
+
+    async def append_input_audio(self, pcm: bytes):
+        if not pcm:
+            return
+        # Base64 is only needed on this leg
+        await self.send_upstream({
+            "type": "input_audio_buffer.append",
+            "audio": base64.b64encode(pcm).decode("ascii")
+        })
+
+    async def send_upstream(self, event: dict):
+        message = json.dumps(event)
+        await self.openai_ws.send(message)
+        metrics.WS_MESSAGES.labels(leg="openai", direction="out").inc()
+        metrics.WS_BYTES.labels(leg="openai", direction="out").inc(len(message))
+
     async def forward_openai_to_client(self):
-        """Forward responses from OpenAI to client."""
+        """Read events from OpenAI, record the transcript and queue what the client needs."""
         try:
             while True:
                 message = await self.openai_ws.recv()
+                received_at = time.monotonic()
+                metrics.WS_MESSAGES.labels(leg="openai", direction="in").inc()
+                metrics.WS_BYTES.labels(leg="openai", direction="in").inc(len(message))
                 data = json.loads(message)
-                
+
                 event_type = data.get("type")
-                
+                self.latency.upstream_event(event_type, received_at)
+                self.turns.upstream_event(event_type, data, received_at)
+
                 if event_type == "response.audio.delta":
                     # Forward audio back to client
-                    await self.client_ws.send_json({
-                        "type": "audio",
-                        "data": data.get("delta")
-                    })
-                    
+                    pcm = base64.b64decode(data.get("delta", ""))
+                    if self.recorder is not None:
+                        self.recorder.add("persona", pcm, received_at)
+                    await self.to_client.put(RelayItem("audio", pcm, received_at))
+
+                elif event_type == "input_audio_buffer.speech_stopped":
+                    # End of speech: don't hold the tail of the utterance in the batch. Signalled
+                    # beside the queue so this reader never waits on, or evicts, caller audio.
+                    self.flush_input.set()
+
                 elif event_type == "conversation.item.input_audio_transcription.completed":
                     # User's speech transcription
                     transcript_text = data.get("transcript", "")
-                    self.transcript.append(f"Caller: {transcript_text}")
-                    await self.client_ws.send_json({
+                    await self.to_client.put(RelayItem("control", {
                         "type": "transcript",
                         "speaker": "caller",
                         "text": transcript_text
-                    })
-                    
+                    }, received_at))
+
                 elif event_type == "response.audio_transcript.done":
                     # AI's speech transcription
                     transcript_text = data.get("transcript", "")
-                    self.transcript.append(f"Persona: {transcript_text}")
-                    await self.client_ws.send_json({
+                    await self.to_client.put(RelayItem("control", {
                         "type": "transcript",
                         "speaker": "persona",
                         "text": transcript_text
-                    })
-                    
+                    }, received_at))
+
                 elif event_type == "response.done":
                     # Response completed
-                    await self.client_ws.send_json({
+                    await self.to_client.put(RelayItem("control", {
                         "type": "response_complete"
-                    })
-                    
+                    }, received_at))
+
                 elif event_type == "error":
                     # Error from OpenAI
-                    await self.client_ws.send_json({
+                    await self.to_client.put(RelayItem("control", {
                         "type": "error",
                         "message": data.get("error", {}).get("message", "Unknown error")
-                    })
+                    }))
                     break
-                    
+
+        except RelayQueueClosed:
+            pass
         except websockets.exceptions.ConnectionClosed:
-            print("OpenAI WebSocket closed")
-        except Exception as e:
-            print(f"Error forwarding OpenAI to client: {e}")
+            logger.info("OpenAI WebSocket closed")
+        except Exception:
+            logger.exception("Error forwarding OpenAI to client")
 
+    async def send_to_client(self):
+        """Drain the downstream queue into the client socket."""
+        try:
+            while True:
+                item = await self.to_client.get()
+                if item.kind == "audio":
+                    await self.client.send_audio(item.payload)
+                    self.latency.audio_sent(item.received_at)
+                else:
+                    await self.client.send_control(item.payload)
+                self.latency.relayed("openai_to_client", item.received_at)
+        except RelayQueueClosed:
+            pass
+        except Exception:
+            logger.exception("Error sending to client")
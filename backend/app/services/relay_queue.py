@@ -0,0 +1,115 @@
+import asyncio
+import enum
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+class OverflowPolicy(str, enum.Enum):
+    BLOCK = "block"  # Wait for the consumer (backpressure onto the producer)
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued audio frame
+    COALESCE = "coalesce"  # Merge audio into the newest queued audio frame
+
+@dataclass
+class RelayItem:
+    kind: str  # "audio" (payload: bytes) or "control" (payload: dict)
+    payload: Any
+    received_at: float = field(default_factory=time.monotonic)
+
+class RelayQueueClosed(Exception):
+    pass
+
+class RelayQueue:
+    """Bounded queue between the two legs of a realtime call.
+
+    Only audio frames are ever dropped or merged; control messages always
+    get through, waiting for room if they have to.
+    """
+
+    def __init__(self, name: str, maxsize: int, policy: OverflowPolicy, max_coalesced_bytes: int = 96000):
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.max_coalesced_bytes = max_coalesced_bytes
+        self._items: deque = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._closed = False
+
+        # Counters
+        self.enqueued = 0
+        self.dropped_frames = 0
+        self.dropped_bytes = 0
+        self.coalesced_frames = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def close(self):
+        """Stop accepting items; the consumer drains what is queued, then gets RelayQueueClosed."""
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def put(self, item: RelayItem):
+        if self._closed:
+            raise RelayQueueClosed(self.name)
+
+        while len(self._items) >= self.maxsize:
+            if item.kind == "audio" and self.policy == OverflowPolicy.COALESCE and self._coalesce(item):
+                return
+            if self.policy != OverflowPolicy.BLOCK and self._drop_oldest_audio():
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+            if self._closed:
+                raise RelayQueueClosed(self.name)
+
+        self._items.append(item)
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._not_empty.set()
+
+    async def get(self) -> RelayItem:
+        while not self._items:
+            if self._closed:
+                raise RelayQueueClosed(self.name)
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        item = self._items.popleft()
+        if len(self._items) < self.maxsize:
+            self._not_full.set()
+        return item
+
+    def _coalesce(self, item: RelayItem) -> bool:
+        tail = self._items[-1] if self._items else None
+        if tail is None or tail.kind != "audio":
+            return False
+        if len(tail.payload) + len(item.payload) > self.max_coalesced_bytes:
+            return False
+        tail.payload = tail.payload + item.payload
+        self.coalesced_frames += 1
+        return True
+
+    def _drop_oldest_audio(self) -> bool:
+        for i, queued in enumerate(self._items):
+            if queued.kind == "audio":
+                del self._items[i]
+                self.dropped_frames += 1
+                self.dropped_bytes += len(queued.payload)
+                return True
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "dropped_frames": self.dropped_frames,
+            "dropped_bytes": self.dropped_bytes,
+            "coalesced_frames": self.coalesced_frames,
+        }
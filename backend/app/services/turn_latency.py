@@ -0,0 +1,121 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from app.services import metrics
+
+# Stages measured from the end of the caller's speech (input_audio_buffer.speech_stopped)
+TURN_STAGES = [
+    "vad_commit",  # input_audio_buffer.committed
+    "caller_transcript",  # conversation.item.input_audio_transcription.completed
+    "first_audio",  # first response.audio.delta received from upstream
+    "first_audio_sent",  # ...and written to the client socket
+    "persona_transcript",  # response.audio_transcript.done
+    "response_done",  # response.done
+]
+
+def _summarize(values) -> Optional[dict]:
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "mean": round(sum(values) / len(values), 1),
+        "p50": round(values[len(values) // 2], 1),
+        "p90": round(values[min(len(values) - 1, int(len(values) * 0.9))], 1),
+        "max": round(values[-1], 1),
+    }
+
+class TurnLatencyTracker:
+    """Per-turn conversational latency for one realtime call.
+
+    Time-to-first-audio is split so a slow turn can be attributed to
+    upstream (speech end -> first delta received), our relay (received ->
+    sent to the client), or the client leg (gaps in the caller's audio).
+    All times are monotonic and reported in milliseconds.
+    """
+
+    def __init__(self):
+        self.turns: List[Dict[str, float]] = []
+        self._current: Optional[Dict[str, float]] = None
+        self._speech_stopped_at: Optional[float] = None
+        self._last_client_audio_at: Optional[float] = None
+        self._client_gap = 0.0
+        self._awaiting_delivery = None  # (turn, speech_stopped_at, first_audio_received_at)
+        # Most recent samples only; the histograms keep the full distribution
+        self.relay_dwell_ms: Dict[str, Deque[float]] = {
+            "client_to_openai": deque(maxlen=2000),
+            "openai_to_client": deque(maxlen=2000),
+        }
+
+    def client_audio(self, received_at: float):
+        if self._last_client_audio_at is not None:
+            self._client_gap = max(self._client_gap, received_at - self._last_client_audio_at)
+        self._last_client_audio_at = received_at
+
+    def relayed(self, direction: str, received_at: float):
+        dwell = time.monotonic() - received_at
+        self.relay_dwell_ms[direction].append(dwell * 1000)
+        metrics.RELAY_DWELL.labels(direction=direction).observe(dwell)
+
+    def upstream_event(self, event_type: str, received_at: float):
+        if event_type == "input_audio_buffer.speech_stopped":
+            self._finish_turn()
+            self._speech_stopped_at = received_at
+            self._current = {"client_audio_gap": self._client_gap * 1000}
+            self._client_gap = 0.0
+        elif event_type == "input_audio_buffer.committed":
+            self._mark("vad_commit", received_at)
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            self._mark("caller_transcript", received_at)
+        elif event_type == "response.audio.delta":
+            if self._current is not None and "first_audio" not in self._current:
+                self._mark("first_audio", received_at)
+                self._awaiting_delivery = (self._current, self._speech_stopped_at, received_at)
+        elif event_type == "response.audio_transcript.done":
+            self._mark("persona_transcript", received_at)
+        elif event_type == "response.done":
+            self._mark("response_done", received_at)
+            self._finish_turn()
+
+    def audio_sent(self, received_at: float):
+        """Called when an upstream audio frame has been written to the client."""
+        if self._awaiting_delivery is None:
+            return
+        turn, speech_stopped_at, first_audio_at = self._awaiting_delivery
+        # Frames read before this turn's first delta belong to an earlier reply
+        if received_at < first_audio_at:
+            return
+        latency = time.monotonic() - speech_stopped_at
+        turn["first_audio_sent"] = latency * 1000
+        metrics.TURN_LATENCY.labels(stage="first_audio_sent").observe(latency)
+        self._awaiting_delivery = None
+
+    def _mark(self, stage: str, at: float):
+        if self._current is None or stage in self._current:
+            return
+        self._current[stage] = (at - self._speech_stopped_at) * 1000
+
+    def _finish_turn(self):
+        if self._current is None:
+            return
+        for stage in TURN_STAGES:
+            # first_audio_sent is observed when the frame is actually written
+            if stage in self._current and stage != "first_audio_sent":
+                metrics.TURN_LATENCY.labels(stage=stage).observe(self._current[stage] / 1000)
+        self.turns.append(self._current)
+        self._current = None
+        self._speech_stopped_at = None
+
+    def summary(self) -> dict:
+        self._finish_turn()
+        stages = {
+            stage: _summarize([turn[stage] for turn in self.turns if stage in turn])
+            for stage in TURN_STAGES + ["client_audio_gap"]
+        }
+        return {
+            "turns": len(self.turns),
+            "stages_ms": {stage: value for stage, value in stages.items() if value},
+            "relay_dwell_ms": {
+                direction: _summarize(values)
+                for direction, values in self.relay_dwell_ms.items() if values
+            },
+        }
@@ -1,30 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.user import User
+from app.utils.cache import LRUCache
 
 security = HTTPBearer()
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as routes see it: a detached, immutable snapshot."""
+    id: int
+    email: str
+    role: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        role = user.role.value if hasattr(user.role, "value") else user.role
+        return cls(id=user.id, email=user.email, role=role, created_at=user.created_at)
+
+# (user_id, token iat) -> (Principal, cached_at). Per worker; the TTL bounds staleness elsewhere.
+_principal_cache = LRUCache(settings.AUTH_PRINCIPAL_CACHE_SIZE, ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+# user_id -> when their cached principals were last invalidated
+_invalidated_at: Dict[int, float] = {}
+
+def invalidate_principal(user_id: int):
+    """Drop every cached principal for a user, whatever token it was cached under."""
+    _invalidated_at[user_id] = time.monotonic()
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_role_change(mapper, connection, target: User):
+    # ORM updates only; bulk UPDATE statements must call invalidate_principal themselves
+    if inspect(target).attrs.role.history.has_changes():
+        invalidate_principal(target.id)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_password_pool = ThreadPoolExecutor(max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_auth_slots = asyncio.Semaphore(settings.AUTH_MAX_CONCURRENT_HASHES)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, get_password_hash, password)
+
+@asynccontextmanager
+async def auth_slot():
+    """Admission control for password work (login, register).
+
+    Waits briefly for one of AUTH_MAX_CONCURRENT_HASHES slots, then sheds
+    load with a 503 so a login burst queues here rather than in the pool,
+    where it would hold memory and delay realtime traffic on the loop.
+    """
+    try:
+        await asyncio.wait_for(_auth_slots.acquire(), timeout=settings.AUTH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        yield
+    finally:
+        _auth_slots.release()
+
+def shutdown_password_pool():
+    _password_pool.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRATION_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -39,27 +116,72 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def create_user_token(user: User) -> str:
+    """Access token for a user. Identity claims are only trusted when JWT_TRUST_IDENTITY_CLAIMS is on."""
+    principal = Principal.from_user(user)
+    return create_access_token(data={
+        "sub": str(user.id),  # python-jose rejects non-string subjects at decode
+        "email": principal.email,
+        "role": principal.role,
+        "created_at": principal.created_at.isoformat()
+    })
+
+def _principal_from_claims(payload: dict) -> Optional[Principal]:
+    try:
+        return Principal(
+            id=int(payload["sub"]),
+            email=payload["email"],
+            role=payload["role"],
+            created_at=datetime.fromisoformat(payload["created_at"])
+        )
+    except (KeyError, TypeError, ValueError):
+        # Token issued before identity claims were added
+        return None
+
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """Resolve the bearer token to a Principal.
+
+    With JWT_TRUST_IDENTITY_CLAIMS the token's own claims are used and no
+    lookup happens at all; role changes then take effect when the token is
+    reissued. Otherwise the user row is cached per (user id, token iat) for
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS, so hot endpoints only pay for decoding.
+    """
     token = credentials.credentials
     payload = decode_token(token)
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    try:
+        user_id = int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
-    user = db.query(User).filter(User.id == user_id).first()
+
+    if settings.JWT_TRUST_IDENTITY_CLAIMS:
+        principal = _principal_from_claims(payload)
+        if principal is not None:
+            return principal
+
+    key = (user_id, payload.get("iat"))
+    cached = _principal_cache.get(key)
+    if cached is not None:
+        principal, cached_at = cached
+        if cached_at > _invalidated_at.get(user_id, 0.0):
+            return principal
+
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
+    principal = Principal.from_user(user)
+    _principal_cache.set(key, (principal, time.monotonic()))
+    return principal
 
-async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_admin_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
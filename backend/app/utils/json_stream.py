@@ -0,0 +1,137 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class JSONObjectStreamParser:
+    """Incremental parser for the top-level fields of a streamed JSON object.
+
+    Feed it chunks as they arrive; each feed returns events:
+
+      ("value", key, value)  a field finished (numbers, booleans, null, strings, nested values)
+      ("delta", key, text)   more characters of a string field still being generated
+
+    Only the top level is interpreted; nested objects and arrays are reported
+    as a whole once they close. The complete text should still be parsed with
+    json.loads at the end, which stays the source of truth.
+    """
+
+    def __init__(self):
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._buffer: List[str] = []  # Current key, scalar or nested value
+        self._escape: Optional[str] = None  # Pending escape sequence inside a string
+        self._string_for = None  # "key" or "value" while inside a string
+        self._depth = 0
+        self._nested_in_string = False
+        self._nested_escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Optional[str], Any]]:
+        events = []
+        delta: List[str] = []
+        for char in chunk:
+            if self._state == "string":
+                self._string_char(char, delta, events)
+            elif self._state == "nested":
+                self._nested_char(char, events)
+            elif self._state == "scalar":
+                if char in ",}" or char.isspace():
+                    self._finish_scalar(events)
+                    self._state = "end" if char == "}" else "after_value"
+                else:
+                    self._buffer.append(char)
+            elif char.isspace():
+                continue
+            elif self._state == "start":
+                if char == "{":
+                    self._state = "key"
+            elif self._state in ("key", "after_value"):
+                if char == '"':
+                    self._start_string("key")
+                elif char == "}":
+                    self._state = "end"
+            elif self._state == "colon":
+                if char == ":":
+                    self._state = "value"
+            elif self._state == "value":
+                if char == '"':
+                    self._start_string("value")
+                elif char in "{[":
+                    self._state = "nested"
+                    self._depth = 1
+                    self._buffer = [char]
+                else:
+                    self._state = "scalar"
+                    self._buffer = [char]
+
+        if delta:
+            events.append(("delta", self._key, "".join(delta)))
+        return events
+
+    def _start_string(self, target: str):
+        self._state = "string"
+        self._string_for = target
+        self._buffer = []
+
+    def _string_char(self, char: str, delta: List[str], events: list):
+        if self._escape is not None:
+            self._escape += char
+            if self._escape.startswith("u"):
+                if len(self._escape) < 5:
+                    return
+                decoded = chr(int(self._escape[1:], 16))
+            else:
+                decoded = _ESCAPES.get(self._escape, self._escape)
+            self._escape = None
+            self._append_string(decoded, delta)
+        elif char == "\\":
+            self._escape = ""
+        elif char == '"':
+            text = "".join(self._buffer)
+            if self._string_for == "key":
+                self._key = text
+                self._state = "colon"
+            else:
+                if delta:
+                    events.append(("delta", self._key, "".join(delta)))
+                    delta.clear()
+                events.append(("value", self._key, text))
+                self._state = "after_value"
+            self._buffer = []
+        else:
+            self._append_string(char, delta)
+
+    def _append_string(self, text: str, delta: List[str]):
+        self._buffer.append(text)
+        if self._string_for == "value":
+            delta.append(text)
+
+    def _nested_char(self, char: str, events: list):
+        self._buffer.append(char)
+        if self._nested_in_string:
+            if self._nested_escape:
+                self._nested_escape = False
+            elif char == "\\":
+                self._nested_escape = True
+            elif char == '"':
+                self._nested_in_string = False
+            return
+        if char == '"':
+            self._nested_in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                events.append(("value", self._key, json.loads("".join(self._buffer))))
+                self._buffer = []
+                self._state = "after_value"
+
+    def _finish_scalar(self, events: list):
+        raw = "".join(self._buffer)
+        self._buffer = []
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        events.append(("value", self._key, value))
@@ -0,0 +1,115 @@
+"""Benchmark input audio coalescing in RealtimeCallHandler.
+
+Replays a synthetic caller stream (one PCM16 frame every --frame-ms) through
+AudioCoalescer for several aggregation windows. For each window it reports
+the upstream message rate, the CPU spent building input_audio_buffer.append
+events (base64 + JSON), and the latency added by holding frames in the batch.
+
+    python benchmarks/bench_audio_coalescing.py --seconds 60 --windows 0,40,100,200
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the parent directory to the path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_coalescer import AudioCoalescer, PCM16_BYTES_PER_MS
+
+def build_append(pcm: bytes) -> str:
+    return json.dumps({
+        "type": "input_audio_buffer.append",
+        "audio": base64.b64encode(pcm).decode("ascii")
+    })
+
+def run_window(window_ms: int, frame_ms: int, seconds: float, utterance_s: float, pause_s: float) -> dict:
+    """Replay the stream on a simulated clock so results don't depend on sleep accuracy."""
+    frame = os.urandom(frame_ms * PCM16_BYTES_PER_MS)
+    coalescer = AudioCoalescer(window_ms)
+    frame_count = int(seconds * 1000 / frame_ms)
+    cycle = utterance_s + pause_s
+
+    pending = []  # arrival times of frames still in the batch
+    added_latency = []
+    messages = 0
+    payload_bytes = 0
+    cpu_start = time.process_time()
+
+    def emit(batch, now):
+        nonlocal messages, payload_bytes
+        if not batch:
+            return
+        payload_bytes += len(build_append(batch))
+        messages += 1
+        added_latency.extend(now - arrived for arrived in pending)
+        pending.clear()
+
+    speaking = True
+    for i in range(frame_count):
+        now = i * frame_ms / 1000
+
+        # Timer-driven flush the handler would do between frames
+        due = coalescer.time_until_flush(now)
+        if due is not None and due <= 0:
+            emit(coalescer.flush(), now)
+
+        # Server VAD reports end of speech at the start of each pause
+        was_speaking = speaking
+        speaking = (now % cycle) < utterance_s
+        if was_speaking and not speaking:
+            emit(coalescer.flush(), now)
+
+        pending.append(now)
+        emit(coalescer.add(frame, now), now)
+
+    # end_call
+    emit(coalescer.flush(), frame_count * frame_ms / 1000)
+    cpu = time.process_time() - cpu_start
+
+    latencies_ms = sorted(l * 1000 for l in added_latency)
+    return {
+        "window_ms": window_ms,
+        "messages": messages,
+        "messages_per_min": messages / seconds * 60,
+        "upstream_kib": payload_bytes / 1024,
+        "cpu_ms": cpu * 1000,
+        "added_latency_mean_ms": statistics.fmean(latencies_ms) if latencies_ms else 0.0,
+        "added_latency_p99_ms": latencies_ms[int(len(latencies_ms) * 0.99) - 1] if latencies_ms else 0.0,
+        "added_latency_max_ms": latencies_ms[-1] if latencies_ms else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the simulated call")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Browser frame interval")
+    parser.add_argument("--windows", default="0,40,100,200", help="Comma-separated aggregation windows in ms (0 = off)")
+    parser.add_argument("--utterance", type=float, default=4.0, help="Seconds of speech before each VAD pause")
+    parser.add_argument("--pause", type=float, default=1.5, help="Seconds of pause between utterances")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [
+        run_window(int(w), args.frame_ms, args.seconds, args.utterance, args.pause)
+        for w in args.windows.split(",")
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results[0]
+    print(f"{'window':>8} {'msgs/min':>10} {'msg cut':>8} {'cpu ms':>9} {'cpu cut':>8} {'lat mean':>9} {'lat p99':>8} {'lat max':>8}")
+    for r in results:
+        msg_cut = 1 - r["messages"] / baseline["messages"] if baseline["messages"] else 0
+        cpu_cut = 1 - r["cpu_ms"] / baseline["cpu_ms"] if baseline["cpu_ms"] else 0
+        print(
+            f"{r['window_ms']:>6}ms {r['messages_per_min']:>10.0f} {msg_cut:>7.0%} {r['cpu_ms']:>9.1f} {cpu_cut:>7.0%} "
+            f"{r['added_latency_mean_ms']:>7.1f}ms {r['added_latency_p99_ms']:>6.1f}ms {r['added_latency_max_ms']:>6.1f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Query plans and timings for the hot-path queries, with and without their indexes.
+
+Builds a synthetic SQLite database with the initial schema's table shapes and
+runs each query shape the API issues (history page, stats windows, achievement
+lookup, persona lookup by script). It prints EXPLAIN QUERY PLAN and the median
+latency, then creates the unique constraints and the call indexes from
+migration 9d06b3e47a21 and repeats. Only the standard library is needed.
+
+    python benchmarks/bench_query_plans.py --users 2000 --calls-per-user 200
+
+Postgres plans differ in detail, but the access paths (full scan + sort vs.
+index range scan in order) are the same; check them there with EXPLAIN ANALYZE.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE NOT NULL);
+CREATE TABLE scripts (id INTEGER PRIMARY KEY, title TEXT NOT NULL);
+CREATE TABLE personas (
+    id INTEGER PRIMARY KEY, script_id INTEGER NOT NULL, difficulty TEXT NOT NULL, name TEXT NOT NULL
+);
+CREATE TABLE calls (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, persona_id INTEGER NOT NULL,
+    transcript TEXT, duration INTEGER, score REAL, feedback TEXT, created_at TIMESTAMP NOT NULL
+);
+CREATE TABLE achievements (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, achievement_type TEXT NOT NULL, unlocked_at TIMESTAMP NOT NULL
+);
+"""
+
+# Mirrors the unique constraints from earlier migrations and migration 9d06b3e47a21
+INDEXES = """
+CREATE UNIQUE INDEX uq_personas_script_difficulty ON personas (script_id, difficulty);
+CREATE UNIQUE INDEX uq_achievements_user_type ON achievements (user_id, achievement_type);
+CREATE INDEX ix_calls_user_created ON calls (user_id, created_at, id);
+CREATE INDEX ix_calls_user_scored ON calls (user_id, created_at, id) WHERE score IS NOT NULL;
+"""
+
+# Query shapes as issued by app/api and app/services
+QUERIES = {
+    "history page (api/calls.py)": (
+        "SELECT calls.id, calls.persona_id, personas.name, personas.difficulty, calls.score, "
+        "calls.duration, calls.created_at FROM calls JOIN personas ON personas.id = calls.persona_id "
+        "WHERE calls.user_id = :user_id AND (calls.created_at, calls.id) < (:created_at, :call_id) "
+        "ORDER BY calls.created_at DESC, calls.id DESC LIMIT 21"
+    ),
+    "stats window last 10 (analysis_pipeline)": (
+        "SELECT AVG(score) FROM (SELECT calls.score FROM calls "
+        "WHERE calls.user_id = :user_id AND calls.score IS NOT NULL "
+        "ORDER BY calls.created_at DESC, calls.id DESC LIMIT 10)"
+    ),
+    "stats window 7 days (analysis_pipeline)": (
+        "SELECT AVG(calls.score) FROM calls "
+        "WHERE calls.user_id = :user_id AND calls.score IS NOT NULL AND calls.created_at >= :since"
+    ),
+    "unlocked achievements (achievements)": (
+        "SELECT achievements.achievement_type FROM achievements WHERE achievements.user_id = :user_id"
+    ),
+    "personas for script (api/scripts.py)": (
+        "SELECT personas.id, personas.name FROM personas WHERE personas.script_id = :script_id"
+    ),
+}
+
+def build_dataset(conn: sqlite3.Connection, users: int, calls_per_user: int, scripts: int, seed: int):
+    rng = random.Random(seed)
+    now = datetime(2026, 10, 1)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO users (id, email) VALUES (?, ?)", ((i, f"user{i}@example.com") for i in range(1, users + 1)))
+    conn.executemany("INSERT INTO scripts (id, title) VALUES (?, ?)", ((i, f"Script {i}") for i in range(1, scripts + 1)))
+    conn.executemany(
+        "INSERT INTO personas (script_id, difficulty, name) VALUES (?, ?, ?)",
+        ((s, d, f"Persona {s}-{d}") for s in range(1, scripts + 1) for d in ("easy", "medium", "hard"))
+    )
+    persona_count = scripts * 3
+
+    def calls():
+        # Interleave users over time like real traffic, so a user's rows are scattered
+        for n in range(users * calls_per_user):
+            user_id = rng.randint(1, users)
+            scored = rng.random() < 0.9
+            yield (
+                user_id,
+                rng.randint(1, persona_count),
+                "Caller: hello\nPersona: hi\n" * 20,
+                rng.randint(30, 600),
+                rng.uniform(20, 100) if scored else None,
+                '{"feedback": "..."}' if scored else None,
+                (now - timedelta(minutes=users * calls_per_user - n)).isoformat(sep=" "),
+            )
+    conn.executemany(
+        "INSERT INTO calls (user_id, persona_id, transcript, duration, score, feedback, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        calls()
+    )
+    conn.executemany(
+        "INSERT INTO achievements (user_id, achievement_type, unlocked_at) VALUES (?, ?, ?)",
+        ((u, t, now.isoformat(sep=" ")) for u in range(1, users + 1) for t in ("first_call", "10_calls"))
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+def sample_params(rng: random.Random, users: int, scripts: int) -> dict:
+    return {
+        "user_id": rng.randint(1, users),
+        "created_at": "2026-10-01 00:00:00",
+        "call_id": 2 ** 62,
+        "since": "2026-09-24 00:00:00",
+        "script_id": rng.randint(1, scripts),
+    }
+
+def measure(conn: sqlite3.Connection, sql: str, rng: random.Random, users: int, scripts: int, runs: int) -> dict:
+    params = sample_params(rng, users, scripts)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    timings = []
+    for _ in range(runs):
+        params = sample_params(rng, users, scripts)
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"plan": plan, "median_ms": statistics.median(timings), "max_ms": max(timings)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--calls-per-user", type=int, default=200)
+    parser.add_argument("--scripts", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=50, help="Executions per query, each with a random user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        started = time.perf_counter()
+        build_dataset(conn, args.users, args.calls_per_user, args.scripts, args.seed)
+        total_calls = conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        print(f"Built {total_calls} calls for {args.users} users in {time.perf_counter() - started:.1f}s\n")
+
+        before = {name: measure(conn, sql, random.Random(args.seed), args.users, args.scripts, args.runs) for name, sql in QUERIES.items()}
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        after = {name: measure(conn, sql, random.Random(args.seed), args.users, args.scripts, args.runs) for name, sql in QUERIES.items()}
+        conn.close()
+
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        speedup = b["median_ms"] / a["median_ms"] if a["median_ms"] else float("inf")
+        print(f"== {name}")
+        print(f"   before: {b['median_ms']:8.3f} ms median  | " + " / ".join(b["plan"]))
+        print(f"   after:  {a['median_ms']:8.3f} ms median  | " + " / ".join(a["plan"]))
+        print(f"   speedup: {speedup:.1f}x\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Concurrent realtime call load test.
+
+Opens --calls synthetic callers against /calls/realtime/{call_id}, streams
+PCM16 audio at real-time pace for --duration seconds, and reports:
+
+  - throughput (frames and bytes relayed per second, both directions)
+  - per-hop relay latency percentiles (client -> upstream, upstream -> client)
+  - event-loop lag of the backend, sampled from /health
+  - memory and CPU per call of the backend process (--server-pid, Linux only)
+
+Per-hop latency needs the simulator in echo mode; all processes must share
+a clock, i.e. run on the same box:
+
+    python benchmarks/realtime_simulator.py --echo --port 9100
+    OPENAI_REALTIME_URL=ws://127.0.0.1:9100/v1/realtime CALL_ANALYSIS_ENABLED=false \\
+        uvicorn app.main:app --port 8000
+    python benchmarks/bench_realtime_calls.py --calls 200 --duration 60 \\
+        --persona-id 1 --server-pid $(pgrep -f "uvicorn app.main:app") --output results.json
+
+Compare a run against a saved baseline (non-zero exit on regression):
+
+    python benchmarks/bench_realtime_calls.py ... --output new.json --compare baseline.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import struct
+import subprocess
+import sys
+import time
+import wave
+from datetime import datetime
+from typing import List, Optional
+import httpx
+import websockets
+
+BINARY_SUBPROTOCOL = "aicall.pcm16.v1"
+FRAME_AUDIO = 0x01
+FRAME_CONTROL = 0x02
+BYTES_PER_MS = 48  # PCM16 mono at 24 kHz
+ECHO_RECORD = 16  # 8-byte client send time + 8-byte simulator receive time
+
+# Metrics where a higher value is a regression, checked by --compare
+REGRESSION_METRICS = [
+    "uplink_latency_ms.p50", "uplink_latency_ms.p99",
+    "downlink_latency_ms.p50", "downlink_latency_ms.p99",
+    "event_loop_lag_ms.p99", "memory_per_call_kib", "cpu_ms_per_call_second",
+]
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+    return {"count": len(values), "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(values[-1], 3)}
+
+def load_pcm(path: Optional[str], frame_bytes: int) -> bytes:
+    """Read a PCM16 24 kHz mono .wav or raw file, or synthesize a few seconds of noise."""
+    if not path:
+        return os.urandom(frame_bytes * 250)
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != 24000:
+                raise SystemExit("WAV input must be PCM16, mono, 24 kHz")
+            return wav.readframes(wav.getnframes())
+    with open(path, "rb") as f:
+        return f.read()
+
+class ProcessSampler:
+    """CPU time and RSS of the backend process from /proc."""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if pid and hasattr(os, "sysconf") else 100
+
+    def cpu_seconds(self) -> Optional[float]:
+        if not self.pid:
+            return None
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15; the split starts at field 3
+        return (int(fields[11]) + int(fields[12])) / self.clock_ticks
+
+    def rss_kib(self) -> Optional[int]:
+        if not self.pid:
+            return None
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return None
+
+class CallStats:
+    def __init__(self):
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.uplink_ms: List[float] = []
+        self.downlink_ms: List[float] = []
+        self.errors: List[str] = []
+        self.connected = False
+
+class SyntheticCaller:
+    def __init__(self, args: argparse.Namespace, call_id: int, pcm: bytes, stats: CallStats):
+        self.args = args
+        self.call_id = call_id
+        self.pcm = pcm
+        self.stats = stats
+        self.frame_bytes = args.frame_ms * BYTES_PER_MS
+
+    def url(self) -> str:
+        base = self.args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+        return f"{base}/calls/realtime/{self.call_id}"
+
+    def encode_audio(self, frame: bytes):
+        if self.args.binary:
+            return bytes((FRAME_AUDIO,)) + frame
+        return json.dumps({"type": "audio", "data": base64.b64encode(frame).decode("ascii")})
+
+    def encode_control(self, message: dict):
+        if self.args.binary:
+            return bytes((FRAME_CONTROL,)) + json.dumps(message).encode("utf-8")
+        return json.dumps(message)
+
+    def decode(self, message):
+        if isinstance(message, bytes):
+            if message[0] == FRAME_AUDIO:
+                return "audio", message[1:]
+            return "control", json.loads(message[1:])
+        data = json.loads(message)
+        if data.get("type") == "audio":
+            return "audio", base64.b64decode(data["data"])
+        return "control", data
+
+    async def run(self):
+        subprotocols = [BINARY_SUBPROTOCOL] if self.args.binary else None
+        try:
+            async with websockets.connect(self.url(), subprotocols=subprotocols, max_size=None) as ws:
+                self.stats.connected = True
+                receiver = asyncio.create_task(self.receive(ws))
+                await self.send(ws)
+                await ws.send(self.encode_control({"type": "end_call"}))
+                # Let in-flight echoes arrive, but don't wait for call analysis
+                await asyncio.sleep(self.args.drain)
+                receiver.cancel()
+                await asyncio.gather(receiver, return_exceptions=True)
+        except Exception as e:
+            self.stats.errors.append(f"{type(e).__name__}: {e}")
+
+    async def send(self, ws):
+        interval = self.args.frame_ms / 1000
+        started = time.perf_counter()
+        offset = 0
+        sent = 0
+        while time.perf_counter() - started < self.args.duration:
+            frame = self.pcm[offset:offset + self.frame_bytes]
+            if len(frame) < self.frame_bytes:
+                offset = 0
+                frame = self.pcm[:self.frame_bytes]
+            offset += self.frame_bytes
+            # Stamp the send time over the first 8 bytes for echo latency
+            frame = struct.pack("<d", time.time()) + frame[8:]
+            await ws.send(self.encode_audio(frame))
+            self.stats.frames_sent += 1
+            self.stats.bytes_sent += len(frame)
+            sent += 1
+            # Pace against the start time so scheduling delays don't accumulate
+            await asyncio.sleep(max(0.0, started + sent * interval - time.perf_counter()))
+
+    async def receive(self, ws):
+        async for message in ws:
+            kind, payload = self.decode(message)
+            if kind != "audio":
+                if payload.get("type") == "error":
+                    self.stats.errors.append(payload.get("message", "error"))
+                continue
+            now = time.time()
+            self.stats.frames_received += 1
+            self.stats.bytes_received += len(payload)
+            if self.args.echo and len(payload) % ECHO_RECORD == 0:
+                # Echo deltas may have been coalesced on the way back
+                for i in range(0, len(payload), ECHO_RECORD):
+                    sent_at, upstream_at = struct.unpack("<dd", payload[i:i + ECHO_RECORD])
+                    self.stats.uplink_ms.append((upstream_at - sent_at) * 1000)
+                    self.stats.downlink_ms.append((now - upstream_at) * 1000)
+
+async def authenticate(client: httpx.AsyncClient, args: argparse.Namespace) -> str:
+    response = await client.post("/auth/login", json={"email": args.email, "password": args.password})
+    if response.status_code == 401:
+        response = await client.post("/auth/register", json={"email": args.email, "password": args.password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def start_calls(client: httpx.AsyncClient, token: str, persona_id: int, count: int) -> List[int]:
+    headers = {"Authorization": f"Bearer {token}"}
+    call_ids = []
+    for _ in range(count):
+        response = await client.post("/calls/start", json={"persona_id": persona_id}, headers=headers)
+        response.raise_for_status()
+        call_ids.append(response.json()["id"])
+    return call_ids
+
+async def sample_health(client: httpx.AsyncClient, samples: list, peak: dict, sampler: ProcessSampler, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            response = await client.get("/health")
+            body = response.json()
+            samples.append(body.get("event_loop_lag", {}).get("max_ms", 0.0))
+            peak["active_calls"] = max(peak["active_calls"], body.get("active_calls", 0))
+        except Exception:
+            pass
+        rss = sampler.rss_kib()
+        if rss is not None:
+            peak["rss_kib"] = max(peak["rss_kib"], rss)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+async def run(args: argparse.Namespace) -> dict:
+    frame_bytes = args.frame_ms * BYTES_PER_MS
+    pcm = load_pcm(args.pcm, frame_bytes)
+    sampler = ProcessSampler(args.server_pid)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        token = await authenticate(client, args)
+        call_ids = await start_calls(client, token, args.persona_id, args.calls)
+
+        rss_before = sampler.rss_kib()
+        cpu_before = sampler.cpu_seconds()
+        lag_samples: list = []
+        peak = {"active_calls": 0, "rss_kib": rss_before or 0}
+        stop = asyncio.Event()
+        health = asyncio.create_task(sample_health(client, lag_samples, peak, sampler, stop))
+
+        stats = [CallStats() for _ in call_ids]
+        callers = []
+        started = time.perf_counter()
+        for i, (call_id, call_stats) in enumerate(zip(call_ids, stats)):
+            callers.append(asyncio.create_task(SyntheticCaller(args, call_id, pcm, call_stats).run()))
+            if args.ramp:
+                await asyncio.sleep(args.ramp / len(call_ids))
+        await asyncio.gather(*callers)
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await health
+        cpu_after = sampler.cpu_seconds()
+
+    connected = sum(1 for s in stats if s.connected)
+    call_seconds = connected * args.duration
+    uplink = [v for s in stats for v in s.uplink_ms]
+    downlink = [v for s in stats for v in s.downlink_ms]
+    errors = [e for s in stats for e in s.errors]
+
+    metrics = {
+        "calls_requested": args.calls,
+        "calls_connected": connected,
+        "calls_with_errors": sum(1 for s in stats if s.errors),
+        "peak_active_calls": peak["active_calls"],
+        "elapsed_s": round(elapsed, 3),
+        "frames_sent_per_s": round(sum(s.frames_sent for s in stats) / elapsed, 1),
+        "frames_received_per_s": round(sum(s.frames_received for s in stats) / elapsed, 1),
+        "kib_sent_per_s": round(sum(s.bytes_sent for s in stats) / 1024 / elapsed, 1),
+        "kib_received_per_s": round(sum(s.bytes_received for s in stats) / 1024 / elapsed, 1),
+        "uplink_latency_ms": percentiles(uplink),
+        "downlink_latency_ms": percentiles(downlink),
+        "event_loop_lag_ms": percentiles(lag_samples),
+        "memory_per_call_kib": round((peak["rss_kib"] - rss_before) / connected, 1) if rss_before and connected else None,
+        "cpu_ms_per_call_second": round((cpu_after - cpu_before) * 1000 / call_seconds, 3) if cpu_before is not None and call_seconds else None,
+        "sample_errors": errors[:10],
+    }
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "calls": args.calls,
+            "duration_s": args.duration,
+            "frame_ms": args.frame_ms,
+            "binary": args.binary,
+            "echo": args.echo,
+        },
+        "metrics": metrics,
+    }
+
+def lookup(metrics: dict, path: str):
+    value = metrics
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print metric deltas; return True if any tracked metric regressed beyond the threshold."""
+    regressed = False
+    print(f"\n{'metric':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for path in REGRESSION_METRICS:
+        old = lookup(baseline["metrics"], path)
+        new = lookup(current["metrics"], path)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{path:<28} {old:>12} {new:>12} {change:>+7.0%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--persona-id", type=int, required=True)
+    parser.add_argument("--calls", type=int, default=50, help="Concurrent synthetic callers")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of audio each caller streams")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which callers connect")
+    parser.add_argument("--drain", type=float, default=1.0, help="Seconds to keep reading after end_call")
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--pcm", help="PCM16 24 kHz mono .wav or raw file to stream (default: noise)")
+    parser.add_argument("--binary", action="store_true", help="Use the binary PCM16 subprotocol")
+    parser.add_argument("--no-echo", dest="echo", action="store_false", help="Simulator is not in --echo mode")
+    parser.add_argument("--server-pid", type=int, help="Backend PID for CPU and memory sampling")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative increase treated as a regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Local stand-in for the OpenAI Realtime API.
+
+Speaks the subset of the protocol RealtimeCallHandler relies on, so the
+voice path can be load-tested without an API key or network access:
+
+  client -> server: session.update, input_audio_buffer.append
+  server -> client: session.updated, input_audio_buffer.speech_started,
+                    input_audio_buffer.speech_stopped, input_audio_buffer.committed,
+                    conversation.item.input_audio_transcription.completed,
+                    response.audio.delta, response.audio_transcript.done,
+                    response.done, error
+
+Turn detection is simulated: a turn ends after --turn-audio-ms of caller
+audio, or after --silence-ms without any append. Each turn is answered
+with --response-deltas audio deltas of --delta-bytes each.
+
+With --echo, every append is answered at once with a 16-byte audio delta:
+the first 8 bytes of the appended audio followed by the simulator's receive
+time (little-endian double, time.time()). bench_realtime_calls.py stamps its
+frames with the send time, which gives per-hop relay latency on one box.
+
+Run it and point the backend at it:
+
+    python benchmarks/realtime_simulator.py --port 9100
+    OPENAI_REALTIME_URL=ws://127.0.0.1:9100/v1/realtime python run.py
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import time
+import websockets
+
+class SimulatorConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.turn_audio_ms = args.turn_audio_ms
+        self.silence_ms = args.silence_ms
+        self.transcription_latency_ms = args.transcription_latency_ms
+        self.response_latency_ms = args.response_latency_ms
+        self.response_deltas = args.response_deltas
+        self.delta_bytes = args.delta_bytes
+        self.delta_interval_ms = args.delta_interval_ms
+        self.jitter_ms = args.jitter_ms
+        self.error_rate = args.error_rate
+        self.disconnect_rate = args.disconnect_rate
+        self.reject_rate = args.reject_rate
+        self.echo = args.echo
+        self.random = random.Random(args.seed)
+
+    def delay(self, base_ms: float) -> float:
+        """Base latency plus uniform jitter, in seconds."""
+        return max(0.0, base_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+class SimulatedSession:
+    """One simulated Realtime API connection."""
+
+    # PCM16 mono at 24 kHz
+    BYTES_PER_MS = 48
+
+    def __init__(self, websocket, config: SimulatorConfig, stats: dict):
+        self.ws = websocket
+        self.config = config
+        self.stats = stats
+        self.turn_bytes = 0
+        self.turn_index = 0
+        self.turns: asyncio.Queue = asyncio.Queue()
+        self.silence_timer = None
+
+    async def send(self, event: dict):
+        await self.ws.send(json.dumps(event))
+        self.stats["events_out"] += 1
+
+    async def run(self):
+        responder = asyncio.create_task(self.respond())
+        try:
+            async for message in self.ws:
+                self.stats["events_in"] += 1
+                event = json.loads(message)
+                event_type = event.get("type")
+
+                if event_type == "session.update":
+                    await self.send({"type": "session.updated", "session": event.get("session", {})})
+
+                elif event_type == "input_audio_buffer.append":
+                    audio = base64.b64decode(event.get("audio", ""))
+                    self.stats["audio_bytes_in"] += len(audio)
+                    if self.config.echo:
+                        await self.send({
+                            "type": "response.audio.delta",
+                            "response_id": "resp_echo",
+                            "item_id": "item_echo",
+                            "delta": base64.b64encode(audio[:8] + struct.pack("<d", time.time())).decode("ascii")
+                        })
+                    if self.turn_bytes == 0:
+                        # Like the real API, the item id of the coming user message is known at speech start
+                        await self.send({
+                            "type": "input_audio_buffer.speech_started",
+                            "item_id": f"item_{self.turn_index + 1}"
+                        })
+                    self.turn_bytes += len(audio)
+                    self.arm_silence_timer()
+                    if self.turn_bytes >= self.config.turn_audio_ms * self.BYTES_PER_MS:
+                        await self.end_turn()
+        finally:
+            responder.cancel()
+            if self.silence_timer:
+                self.silence_timer.cancel()
+
+    def arm_silence_timer(self):
+        if self.silence_timer:
+            self.silence_timer.cancel()
+        self.silence_timer = asyncio.get_running_loop().call_later(
+            self.config.silence_ms / 1000,
+            lambda: asyncio.ensure_future(self.end_turn())
+        )
+
+    async def end_turn(self):
+        if self.turn_bytes == 0:
+            return
+        if self.silence_timer:
+            self.silence_timer.cancel()
+            self.silence_timer = None
+        self.turn_index += 1
+        self.turn_bytes = 0
+        await self.send({"type": "input_audio_buffer.speech_stopped", "item_id": f"item_{self.turn_index}"})
+        await self.send({"type": "input_audio_buffer.committed", "item_id": f"item_{self.turn_index}"})
+        self.turns.put_nowait(self.turn_index)
+
+    async def respond(self):
+        config = self.config
+        while True:
+            turn = await self.turns.get()
+
+            await asyncio.sleep(config.delay(config.transcription_latency_ms))
+            await self.send({
+                "type": "conversation.item.input_audio_transcription.completed",
+                "item_id": f"item_{turn}",
+                "transcript": f"Simulated caller utterance {turn}."
+            })
+
+            # Failure injection
+            roll = config.random.random()
+            if roll < config.disconnect_rate:
+                self.stats["disconnects"] += 1
+                await self.ws.close(code=1011, reason="Simulated upstream failure")
+                return
+            if roll < config.disconnect_rate + config.error_rate:
+                self.stats["errors"] += 1
+                await self.send({
+                    "type": "error",
+                    "error": {"type": "server_error", "message": "Simulated upstream error"}
+                })
+                continue
+
+            await asyncio.sleep(config.delay(config.response_latency_ms))
+            response_id = f"resp_{turn}"
+            item_id = f"item_reply_{turn}"
+            await self.send({"type": "response.created", "response": {"id": response_id, "status": "in_progress"}})
+            for _ in range(0 if config.echo else config.response_deltas):
+                await self.send({
+                    "type": "response.audio.delta",
+                    "response_id": response_id,
+                    "item_id": item_id,
+                    "delta": base64.b64encode(os.urandom(config.delta_bytes)).decode("ascii")
+                })
+                self.stats["audio_bytes_out"] += config.delta_bytes
+                await asyncio.sleep(config.delay(config.delta_interval_ms))
+
+            await self.send({
+                "type": "response.audio_transcript.done",
+                "response_id": response_id,
+                "item_id": item_id,
+                "transcript": f"Simulated persona reply {turn}."
+            })
+            await self.send({"type": "response.done", "response": {"id": response_id, "status": "completed"}})
+            self.stats["turns"] += 1
+
+async def serve(args: argparse.Namespace):
+    config = SimulatorConfig(args)
+    stats = {
+        "connections": 0, "active": 0, "rejected": 0, "turns": 0, "errors": 0, "disconnects": 0,
+        "events_in": 0, "events_out": 0, "audio_bytes_in": 0, "audio_bytes_out": 0,
+    }
+
+    async def handler(websocket):
+        if config.random.random() < config.reject_rate:
+            stats["rejected"] += 1
+            await websocket.close(code=1013, reason="Simulated overload")
+            return
+        stats["connections"] += 1
+        stats["active"] += 1
+        try:
+            await SimulatedSession(websocket, config, stats).run()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            stats["active"] -= 1
+
+    async with websockets.serve(handler, args.host, args.port, max_size=None):
+        print(f"Realtime simulator listening on ws://{args.host}:{args.port}/v1/realtime")
+        started = time.monotonic()
+        while True:
+            await asyncio.sleep(args.report_interval or 3600)
+            if args.report_interval:
+                print(f"[{time.monotonic() - started:7.0f}s] {json.dumps(stats)}")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--turn-audio-ms", type=int, default=3000, help="Caller audio per turn before VAD commits")
+    parser.add_argument("--silence-ms", type=int, default=500, help="Idle time that also ends a turn")
+    parser.add_argument("--transcription-latency-ms", type=float, default=150)
+    parser.add_argument("--response-latency-ms", type=float, default=400, help="Delay before the first audio delta")
+    parser.add_argument("--response-deltas", type=int, default=50, help="Audio deltas per response")
+    parser.add_argument("--delta-bytes", type=int, default=4800, help="Bytes of PCM16 per delta (4800 = 100 ms)")
+    parser.add_argument("--delta-interval-ms", type=float, default=100, help="Pacing between deltas")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform jitter applied to every delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability a turn answers with an error event")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Probability a turn drops the connection")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Probability a new connection is refused")
+    parser.add_argument("--echo", action="store_true", help="Answer every append with a timestamped echo delta")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between stats lines")
+    return parser
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(build_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import tempfile
+import pytest
+
+# Settings are read when app.config is imported, so the environment comes first
+_tmp = tempfile.mkdtemp(prefix="aicalltrainer-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:3000")
+os.environ.setdefault("BACKEND_URL", "http://localhost:8000")
+os.environ.setdefault("RECORDINGS_DIR", os.path.join(_tmp, "recordings"))
+
+@pytest.fixture
+def db():
+    """A fresh schema; yields a runner for coroutines against AsyncSessionLocal."""
+    import app.models  # noqa: F401  Registers every table on Base.metadata
+    from app.database import Base, async_engine
+
+    async def reset():
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await async_engine.dispose()
+
+    asyncio.run(reset())
+
+    def run(coro):
+        async def wrapped():
+            try:
+                return await coro
+            finally:
+                # Each asyncio.run gets a new loop; pooled connections can't cross it
+                await async_engine.dispose()
+        return asyncio.run(wrapped())
+
+    return run
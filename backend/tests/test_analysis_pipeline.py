@@ -0,0 +1,134 @@
+import itertools
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import User, Script, Persona, Call, AnalysisJob, JobStatus, UserStats
+from app.models.persona import DifficultyLevel
+from app.services.analysis_pipeline import _claim_job, _on_job_failure, _sweep_jobs, update_user_stats
+
+_emails = (f"caller{n}@example.com" for n in itertools.count())
+STALE = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS + 60)
+
+async def _add_call(db, user_id: int = None, **values) -> Call:
+    if user_id is None:
+        user = User(email=next(_emails), password_hash="x")
+        db.add(user)
+        await db.flush()
+        user_id = user.id
+    script = Script(title="Script", content="Hello", created_by=user_id)
+    db.add(script)
+    await db.flush()
+    persona = Persona(script_id=script.id, difficulty=DifficultyLevel.EASY, name="Pat", personality="{}", objections="[]")
+    db.add(persona)
+    await db.flush()
+    call = Call(user_id=user_id, persona_id=persona.id, **values)
+    db.add(call)
+    await db.flush()
+    return call
+
+async def _add_job(status: JobStatus, attempts: int, updated_at: datetime = None) -> int:
+    async with AsyncSessionLocal() as db:
+        call = await _add_call(db)
+        db.add(AnalysisJob(call_id=call.id, status=status, attempts=attempts, updated_at=updated_at or datetime.utcnow()))
+        await db.commit()
+        return call.id
+
+async def _job(call_id: int) -> AnalysisJob:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(AnalysisJob).where(AnalysisJob.call_id == call_id))
+
+async def _claim(call_id: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        return await _claim_job(db, call_id)
+
+def test_claims_pending_job_once(db):
+    call_id = db(_add_job(JobStatus.PENDING, 0))
+    assert db(_claim(call_id))
+    assert not db(_claim(call_id))
+    job = db(_job(call_id))
+    assert job.status == JobStatus.RUNNING
+    assert job.attempts == 1
+
+def test_reclaims_stale_run_as_an_attempt(db):
+    call_id = db(_add_job(JobStatus.RUNNING, 1, STALE))
+    assert db(_claim(call_id))
+    assert db(_job(call_id)).attempts == 2
+
+def test_does_not_reclaim_stale_run_out_of_attempts(db):
+    call_id = db(_add_job(JobStatus.RUNNING, settings.ANALYSIS_MAX_ATTEMPTS, STALE))
+    assert not db(_claim(call_id))
+    assert db(_job(call_id)).attempts == settings.ANALYSIS_MAX_ATTEMPTS
+
+def test_sweep_fails_exhausted_runs_and_requeues_the_rest(db):
+    exhausted = db(_add_job(JobStatus.RUNNING, settings.ANALYSIS_MAX_ATTEMPTS, STALE))
+    stale = db(_add_job(JobStatus.RUNNING, 1, STALE))
+    running = db(_add_job(JobStatus.RUNNING, 1))
+    assert db(_sweep_jobs()) == [stale]
+    job = db(_job(exhausted))
+    assert job.status == JobStatus.FAILED
+    assert job.last_error == "Abandoned by its worker too many times"
+    assert db(_job(running)).status == JobStatus.RUNNING
+
+def test_failure_retries_until_out_of_attempts(db):
+    call_id = db(_add_job(JobStatus.RUNNING, settings.ANALYSIS_MAX_ATTEMPTS - 1))
+    assert db(_on_job_failure(call_id, ValueError("boom")))
+    assert db(_job(call_id)).status == JobStatus.PENDING
+
+    assert db(_claim(call_id))
+    assert not db(_on_job_failure(call_id, ValueError("boom again")))
+    job = db(_job(call_id))
+    assert job.status == JobStatus.FAILED
+    assert job.last_error == "boom again"
+
+STATS_FIELDS = ("total_calls", "avg_score", "avg_last_5", "avg_last_10", "avg_7d", "recent_improvement")
+
+async def _score_calls(scores, days_ago=None, with_stats=True):
+    """Score calls for one new user, oldest first, as the analysis worker does; returns each update's stats."""
+    days_ago = days_ago or [0] * len(scores)
+    async with AsyncSessionLocal() as db:
+        user = User(email=next(_emails), password_hash="x")
+        db.add(user)
+        await db.flush()
+        if with_stats:
+            db.add(UserStats(user_id=user.id))
+        now = datetime.utcnow()
+        updates = []
+        for i, (score, days) in enumerate(zip(scores, days_ago)):
+            call = await _add_call(db, user.id, created_at=now - timedelta(days=days, seconds=len(scores) - i))
+            call.score = score
+            stats = await update_user_stats(db, call)
+            # Every update returns the same identity-mapped row, so keep a copy of each
+            updates.append(stats and {column: getattr(stats, column) for column in STATS_FIELDS})
+            await db.commit()
+        return updates
+
+def test_stats_first_scored_call(db):
+    [stats] = db(_score_calls([80]))
+    assert stats["total_calls"] == 1
+    assert stats["avg_score"] == 80
+    assert stats["avg_last_5"] == stats["avg_last_10"] == stats["avg_7d"] == 80
+    assert stats["recent_improvement"] == 0
+
+def test_stats_windows_follow_the_most_recent_calls(db):
+    scores = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 50, 60]
+    updates = db(_score_calls(scores))
+
+    # Until there are ten calls there is nothing to compare against
+    assert all(stats["recent_improvement"] == 0 for stats in updates[:9])
+    assert updates[9]["recent_improvement"] == pytest.approx(80 - 30)
+    stats = updates[-1]
+    assert stats["total_calls"] == 12
+    assert stats["avg_score"] == pytest.approx(sum(scores) / 12)
+    assert stats["avg_last_5"] == pytest.approx(sum(scores[-5:]) / 5)
+    assert stats["avg_last_10"] == pytest.approx(sum(scores[-10:]) / 10)
+    assert stats["recent_improvement"] == pytest.approx(sum(scores[-5:]) / 5 - sum(scores[-10:-5]) / 5)
+
+def test_stats_7d_average_skips_older_calls(db):
+    stats = db(_score_calls([20, 40, 90], days_ago=[30, 8, 1]))[-1]
+    assert stats["avg_7d"] == 90
+    assert stats["avg_last_5"] == pytest.approx(50)
+
+def test_stats_without_a_stats_row(db):
+    assert db(_score_calls([70], with_stats=False)) == [None]
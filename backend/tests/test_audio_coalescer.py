@@ -0,0 +1,51 @@
+import pytest
+from app.services.audio_coalescer import AudioCoalescer, PCM16_BYTES_PER_MS
+
+FRAME = bytes(PCM16_BYTES_PER_MS * 20)  # 20 ms
+
+def test_flushes_when_size_limit_reached():
+    coalescer = AudioCoalescer(max_delay_ms=100, max_bytes=len(FRAME) * 3)
+    assert coalescer.add(FRAME, 0.0) is None
+    assert coalescer.add(FRAME, 0.02) is None
+    batch = coalescer.add(FRAME, 0.04)
+    assert batch == FRAME * 3
+    assert not coalescer.pending
+    assert coalescer.stats() == {"frames_in": 3, "batches_out": 1}
+
+def test_size_limit_defaults_to_delay_worth_of_audio():
+    coalescer = AudioCoalescer(max_delay_ms=60)
+    assert coalescer.max_bytes == 60 * PCM16_BYTES_PER_MS
+    assert coalescer.add(FRAME, 0.0) is None
+    assert coalescer.add(FRAME, 0.02) is None
+    assert coalescer.add(FRAME, 0.04) == FRAME * 3
+
+def test_deadline_counts_from_oldest_frame():
+    coalescer = AudioCoalescer(max_delay_ms=100, max_bytes=len(FRAME) * 10)
+    assert coalescer.time_until_flush(0.0) is None
+    coalescer.add(FRAME, 1.0)
+    coalescer.add(FRAME, 1.05)
+    assert coalescer.time_until_flush(1.05) == pytest.approx(0.05)
+    assert coalescer.time_until_flush(1.5) == 0.0
+    assert coalescer.flush() == FRAME * 2
+    assert coalescer.time_until_flush(1.5) is None
+
+def test_zero_delay_batches_by_size_only():
+    coalescer = AudioCoalescer(max_delay_ms=0, max_bytes=len(FRAME) * 2)
+    assert coalescer.enabled
+    assert coalescer.add(FRAME, 0.0) is None
+    assert coalescer.pending
+    assert coalescer.time_until_flush(10.0) is None
+    assert coalescer.add(FRAME, 10.0) == FRAME * 2
+
+def test_disabled_passes_frames_through():
+    coalescer = AudioCoalescer(max_delay_ms=0)
+    assert not coalescer.enabled
+    assert coalescer.add(FRAME, 0.0) is FRAME
+    assert not coalescer.pending
+    assert coalescer.flush() is None
+    assert coalescer.stats() == {"frames_in": 1, "batches_out": 1}
+
+def test_flush_empty_returns_none():
+    coalescer = AudioCoalescer(max_delay_ms=100)
+    assert coalescer.flush() is None
+    assert coalescer.batches_out == 0
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import User, Script, JobStatus
+from app.services.persona_pipeline import _claim_script, _on_job_failure, _sweep_scripts
+
+STALE = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS + 60)
+
+async def _add_script(status: JobStatus, attempts: int, updated_at: datetime = None) -> int:
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, 1)
+        if user is None:
+            db.add(User(id=1, email="admin@example.com", password_hash="x"))
+        script = Script(
+            title="Script",
+            content="Hello",
+            created_by=1,
+            persona_status=status,
+            persona_attempts=attempts,
+            persona_updated_at=updated_at or datetime.utcnow()
+        )
+        db.add(script)
+        await db.commit()
+        return script.id
+
+async def _script(script_id: int) -> Script:
+    async with AsyncSessionLocal() as db:
+        return await db.get(Script, script_id)
+
+async def _claim(script_id: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        return await _claim_script(db, script_id)
+
+def test_claims_pending_script_once(db):
+    script_id = db(_add_script(JobStatus.PENDING, 0))
+    assert db(_claim(script_id))
+    assert not db(_claim(script_id))
+    script = db(_script(script_id))
+    assert script.persona_status == JobStatus.RUNNING
+    assert script.persona_attempts == 1
+
+def test_reclaims_stale_run_as_an_attempt(db):
+    script_id = db(_add_script(JobStatus.RUNNING, 1, STALE))
+    assert db(_claim(script_id))
+    assert db(_script(script_id)).persona_attempts == 2
+
+def test_does_not_reclaim_stale_run_out_of_attempts(db):
+    script_id = db(_add_script(JobStatus.RUNNING, settings.PERSONA_MAX_ATTEMPTS, STALE))
+    assert not db(_claim(script_id))
+    assert db(_script(script_id)).persona_attempts == settings.PERSONA_MAX_ATTEMPTS
+
+def test_sweep_fails_exhausted_runs_and_requeues_the_rest(db):
+    exhausted = db(_add_script(JobStatus.RUNNING, settings.PERSONA_MAX_ATTEMPTS, STALE))
+    stale = db(_add_script(JobStatus.RUNNING, 1, STALE))
+    running = db(_add_script(JobStatus.RUNNING, 1))
+    assert db(_sweep_scripts()) == [stale]
+    script = db(_script(exhausted))
+    assert script.persona_status == JobStatus.FAILED
+    assert script.persona_error == "Abandoned by its worker too many times"
+    assert db(_script(running)).persona_status == JobStatus.RUNNING
+
+def test_failure_retries_until_out_of_attempts(db):
+    script_id = db(_add_script(JobStatus.RUNNING, settings.PERSONA_MAX_ATTEMPTS - 1))
+    assert db(_on_job_failure(script_id, ValueError("boom")))
+    assert db(_script(script_id)).persona_status == JobStatus.PENDING
+
+    assert db(_claim(script_id))
+    assert not db(_on_job_failure(script_id, ValueError("boom again")))
+    script = db(_script(script_id))
+    assert script.persona_status == JobStatus.FAILED
+    assert script.persona_error == "boom again"
@@ -59,7 +59,8 @@ export const scriptsApi = {
 export const callsApi = {
   start: (persona_id: number) => api.post('/calls/start', { persona_id }),
   getById: (id: number) => api.get(`/calls/${id}`),
-  getHistory: () => api.get('/calls/history'),
+  getHistory: (cursor?: string, limit = 20) =>
+    api.get('/calls/history', { params: { cursor, limit } }),
   end: (id: number) => api.post(`/calls/${id}/end`),
 };
 
@@ -93,6 +93,14 @@ export default function CallPage() {
           ...prev,
           { speaker: data.speaker, text: data.text }
         ]);
+      } else if (data.type === 'analysis.reset') {
+        // The analysis is being retried and streams again from the start
+        setCallFeedback(null);
+      } else if (data.type === 'analysis.scores') {
+        // Scores arrive while the feedback text is still being written
+        setCallFeedback((prev: any) => ({ ...prev, ...data.scores }));
+      } else if (data.type === 'analysis.feedback.delta') {
+        setCallFeedback((prev: any) => ({ ...prev, feedback: (prev?.feedback || '') + data.delta }));
       } else if (data.type === 'call_complete') {
         setCallFeedback(data.analysis);
         setIsInCall(false);
@@ -124,8 +132,8 @@ export default function CallPage() {
 
   const endCall = () => {
     if (wsRef.current) {
+      // Keep the socket open; the server pushes call_complete once analysis is done
       wsRef.current.send(JSON.stringify({ type: 'end_call' }));
-      wsRef.current.close();
     }
     setIsInCall(false);
   };